@@ -0,0 +1,303 @@
+"""Versioned on-disk index artifact.
+
+Build it offline with ``python artifact.py build``; at startup the app loads
+the artifact matching the current source CSVs and only rebuilds (and saves)
+when their content hash has changed.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import joblib
+import numpy as np
+from scipy import sparse
+
+from career_graph import CareerGraph
+from catalog import Catalog, catalog_frame
+from fastjson import dumps
+from enrichment_store import EnrichmentStore
+from index_manifest import INDEX_DIR, MANIFEST, publish_key, published_key
+from ingest import INGEST_DEDUP, SOURCES, ProviderAdapter, load_catalog_frame
+from logs import configure_logging, get_logger
+from metrics import record
+from scoring import ScoringEngine
+from retrieval import TWO_STAGE_MIN_COURSES, CandidateGenerator
+from role_profiles import RoleProfileIndex
+from search_index import CourseIndex, course_corpus
+from skill_index import SkillIndex
+from taxonomy import KNOWN_SKILLS
+
+log = get_logger("artifact")
+
+# Bump whenever the on-disk layout or the index construction changes
+ARTIFACT_VERSION = 8
+# Refit the vectorizer once rows vectorised with a stale vocabulary/idf
+# exceed this share of the catalog
+INCREMENTAL_LIMIT = 0.1
+
+
+class IndexBundle:
+    """Catalog plus the TF-IDF and skill indexes built from it.
+
+    A bundle is immutable once built; reloading produces a new bundle that
+    replaces the old one as a whole.
+    """
+
+    def __init__(self, catalog, course_index, skill_index, key=None, timings=None, stale_rows=0):
+        self.catalog = catalog
+        self.course_index = course_index
+        self.skill_index = skill_index
+        self.scoring_engine = ScoringEngine(catalog, skill_index)
+        # Large catalogs rank retrieved candidates instead of every row
+        self.candidates = None
+        if len(catalog) >= TWO_STAGE_MIN_COURSES:
+            self.candidates = CandidateGenerator(course_index, skill_index, self.scoring_engine)
+        # Unique job roles from subject and level
+        self.job_roles = sorted(set(catalog.unique("subject") + catalog.unique("level")))
+        # /job_roles and /platforms bodies, encoded once per generation
+        self.job_roles_json = dumps(self.job_roles)
+        self.platforms_json = dumps({"platforms": catalog.unique("provider")})
+        self.role_profiles = RoleProfileIndex(course_index, self.scoring_engine, self.job_roles)
+        self.career_graph = CareerGraph(course_index, self.scoring_engine)
+        self.enriched_courses = catalog.enriched_count()
+        self.key = key
+        self.timings = timings or {}
+        # Rows appended without refitting the vectorizer
+        self.stale_rows = stale_rows
+        self.generation = 0
+
+
+def save_sparse(path, matrix):
+    """Save a CSR/CSC matrix as raw ``.npy`` arrays so it can be memory-mapped"""
+    os.makedirs(path, exist_ok=True)
+    np.save(os.path.join(path, "data.npy"), matrix.data)
+    np.save(os.path.join(path, "indices.npy"), matrix.indices)
+    np.save(os.path.join(path, "indptr.npy"), matrix.indptr)
+    with open(os.path.join(path, "matrix.json"), "w") as f:
+        json.dump({"format": matrix.format, "shape": matrix.shape}, f)
+
+
+def load_sparse(path, mmap_mode="r"):
+    with open(os.path.join(path, "matrix.json")) as f:
+        meta = json.load(f)
+    arrays = tuple(
+        np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode) for name in ("data", "indices", "indptr")
+    )
+    matrix_class = sparse.csr_matrix if meta["format"] == "csr" else sparse.csc_matrix
+    return matrix_class(arrays, shape=tuple(meta["shape"]), copy=False)
+
+
+def source_key(sources=SOURCES, skills=KNOWN_SKILLS):
+    """Hash of the source CSV contents and everything else the index depends on"""
+    digest = hashlib.sha256()
+    digest.update(f"v{ARTIFACT_VERSION}".encode())
+    digest.update("\n".join(skills).encode())
+    digest.update(f"dedup={INGEST_DEDUP}".encode())
+    digest.update(f"enrichment={EnrichmentStore().fingerprint()}".encode())
+    for name, loader, path in sources:
+        digest.update(name.encode())
+        adapter = getattr(loader, "__self__", loader)
+        if isinstance(adapter, ProviderAdapter):
+            digest.update(adapter.describe().encode())
+        if not os.path.exists(path):
+            digest.update(b"missing")
+            continue
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()[:16]
+
+
+def timed(timings, stage, start):
+    """Store the seconds since ``start`` under ``stage`` and in the stage metrics"""
+    seconds = timings[stage] = time.perf_counter() - start
+    record(stage, seconds)
+    return seconds
+
+
+def build_bundle(sources=SOURCES, skills=KNOWN_SKILLS, key=None, frame=None, timings=None):
+    """Parse every source and build the indexes from scratch"""
+    timings = {} if timings is None else timings
+    if frame is None:
+        frame = load_catalog_frame(sources, timings)
+    catalog = Catalog(frame)
+    log.info("catalog_built", courses=len(catalog))
+
+    start = time.perf_counter()
+    course_index = CourseIndex(catalog)
+    timed(timings, "tfidf_index", start)
+
+    start = time.perf_counter()
+    skill_index = SkillIndex(catalog, skills)
+    timed(timings, "skill_index", start)
+    return IndexBundle(catalog, course_index, skill_index, key=key or source_key(sources, skills), timings=timings)
+
+
+def extend_bundle(bundle, frame, key, timings=None):
+    """Append new courses to ``bundle`` without refitting the vectorizer.
+
+    Only applies when ``frame`` starts with exactly the courses already in
+    ``bundle`` (same titles and URLs, same order, and the same TF-IDF and
+    skill-matching text) and the rows vectorised with the old vocabulary
+    stay under ``INCREMENTAL_LIMIT``; returns ``None`` otherwise so the
+    caller does a full rebuild.
+    """
+    old = bundle.catalog
+    added = len(frame) - len(old)
+    stale_rows = bundle.stale_rows + added
+    if added <= 0 or stale_rows > INCREMENTAL_LIMIT * len(frame):
+        return None
+    head = frame.iloc[:len(old)]
+    if not all(
+        np.array_equal(head[column].to_numpy(dtype=object), old.column(column)) for column in ("title", "url")
+    ):
+        return None
+
+    timings = {} if timings is None else timings
+    start = time.perf_counter()
+    catalog = Catalog(frame)
+    # Edits to any text input of an existing row (subject, level, description
+    # fields, enrichments) would leave its TF-IDF and skill rows stale
+    corpus = course_corpus(catalog)
+    if corpus[:len(old)] != course_corpus(old) or catalog.skill_texts()[:len(old)] != old.skill_texts():
+        return None
+    new_rows = Catalog(catalog_frame(frame.iloc[len(old):].reset_index(drop=True)))
+    vectorizer = bundle.course_index.vectorizer
+    X = sparse.vstack([bundle.course_index.X, vectorizer.transform(corpus[len(old):])], format="csr")
+    course_index = CourseIndex(catalog, vectorizer, X)
+    new_skills = SkillIndex(new_rows, bundle.skill_index.skills).matrix
+    skill_matrix = sparse.vstack([bundle.skill_index.matrix, new_skills], format="csc")
+    skill_index = SkillIndex(catalog, bundle.skill_index.skills, matrix=skill_matrix)
+    timed(timings, "extend_index", start)
+    log.info("index_extended", added=added, stale_rows=stale_rows)
+    return IndexBundle(catalog, course_index, skill_index, key=key, timings=timings, stale_rows=stale_rows)
+
+
+def save_bundle(bundle, index_dir=INDEX_DIR):
+    """Write ``bundle`` to ``index_dir/<key>`` atomically, publish its key and prune older keys.
+
+    The previously published artifact is kept: other workers serve it, or
+    are loading it, until their next poll of the published key.
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    target = os.path.join(index_dir, bundle.key)
+    tmp = tempfile.mkdtemp(prefix=f".{bundle.key}-", dir=index_dir)
+    try:
+        bundle.catalog.save(os.path.join(tmp, "catalog"))
+        joblib.dump(bundle.course_index.vectorizer, os.path.join(tmp, "vectorizer.joblib"))
+        save_sparse(os.path.join(tmp, "tfidf"), bundle.course_index.X)
+        save_sparse(os.path.join(tmp, "skills"), bundle.skill_index.matrix)
+        bundle.career_graph.save(os.path.join(tmp, "career"))
+        bundle.role_profiles.save(os.path.join(tmp, "roles"))
+        manifest = {
+            "version": ARTIFACT_VERSION,
+            "key": bundle.key,
+            "built_at": time.time(),
+            "courses": len(bundle.catalog),
+            "stale_rows": bundle.stale_rows,
+            "skills": bundle.skill_index.skills,
+            # Served by a lazily starting app until the index is loaded
+            "job_roles": bundle.job_roles,
+            "platforms": bundle.catalog.unique("provider"),
+        }
+        with open(os.path.join(tmp, MANIFEST), "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp, target)
+    except OSError:
+        # Another worker already published this key
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not os.path.exists(os.path.join(target, MANIFEST)):
+            raise
+    previous = published_key(index_dir)
+    publish_key(bundle.key, index_dir)
+
+    for entry in os.listdir(index_dir):
+        if entry not in (bundle.key, previous) and not entry.startswith("."):
+            shutil.rmtree(os.path.join(index_dir, entry), ignore_errors=True)
+    return target
+
+
+def load_bundle(key, index_dir=INDEX_DIR):
+    """Load the artifact for ``key``, or ``None`` if there isn't a usable one.
+
+    Catalog columns and sparse matrices are memory-mapped read-only, so
+    worker processes share the same physical pages through the page cache.
+    """
+    path = os.path.join(index_dir, key)
+    try:
+        with open(os.path.join(path, MANIFEST)) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if manifest.get("version") != ARTIFACT_VERSION or manifest.get("key") != key:
+        return None
+
+    catalog = Catalog.load(os.path.join(path, "catalog"))
+    vectorizer = joblib.load(os.path.join(path, "vectorizer.joblib"))
+    X = load_sparse(os.path.join(path, "tfidf"))
+    skill_matrix = load_sparse(os.path.join(path, "skills"))
+    course_index = CourseIndex(catalog, vectorizer, X)
+    skill_index = SkillIndex(catalog, manifest["skills"], matrix=skill_matrix)
+    bundle = IndexBundle(catalog, course_index, skill_index, key=key, stale_rows=manifest.get("stale_rows", 0))
+    # Without saved rankings (or after taxonomy changes) they are ranked on first use
+    bundle.career_graph.restore(os.path.join(path, "career"))
+    bundle.role_profiles.restore(os.path.join(path, "roles"))
+    return bundle
+
+
+def load_or_build(sources=SOURCES, skills=KNOWN_SKILLS, index_dir=INDEX_DIR, previous=None):
+    """Load the artifact matching the current sources, rebuilding it if stale.
+
+    When ``previous`` is given and the sources only gained a few courses,
+    they are appended to it instead of rebuilding everything.
+    """
+    start = time.perf_counter()
+    key = source_key(sources, skills)
+    bundle = load_bundle(key, index_dir)
+    if bundle is not None:
+        timed(bundle.timings, "load_artifact", start)
+        log.info("artifact_loaded", key=key, courses=len(bundle.catalog), seconds=bundle.timings["load_artifact"])
+        return bundle
+
+    log.info("artifact_missing", key=key, action="rebuild")
+    timings = {}
+    frame = load_catalog_frame(sources, timings)
+    bundle = None
+    if previous is not None and list(previous.skill_index.skills) == list(dict.fromkeys(skills)):
+        bundle = extend_bundle(previous, frame, key, timings)
+    if bundle is None:
+        bundle = build_bundle(sources, skills, key=key, frame=frame, timings=timings)
+    try:
+        start = time.perf_counter()
+        save_bundle(bundle, index_dir)
+        timed(bundle.timings, "save_artifact", start)
+    except OSError as e:
+        log.error("artifact_save_failed", key=key, error=str(e))
+        return bundle
+
+    # Swap the freshly built arrays for the memory-mapped copies on disk
+    saved = load_bundle(key, index_dir)
+    if saved is None:
+        return bundle
+    saved.timings = bundle.timings
+    return saved
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the course index artifact")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--index-dir", default=INDEX_DIR)
+    args = parser.parse_args()
+
+    configure_logging()
+    bundle = build_bundle()
+    path = save_bundle(bundle, args.index_dir)
+    print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+"""Benchmarks and an in-process load test for the recommendation API.
+
+Generates synthetic catalogs from the ``udemy_courses.csv`` schema, times
+the hot paths (CSV load, index build, single-query scoring, skill matching,
+career paths), then drives the FastAPI app through an in-process ASGI
+client with a fake Gemini model::
+
+    python bench.py --sizes 10000,100000
+    python bench.py --sizes 10000 --save      # record a baseline
+    python bench.py --sizes 10000 --compare   # exit 1 on a regression
+
+Latencies are reported as p50/p95/p99 in milliseconds, plus QPS and the
+process RSS after each size.
+"""
+import argparse
+import asyncio
+import atexit
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+BENCH_DIR = os.getenv("BENCH_DIR", os.path.join(tempfile.gettempdir(), "upskill-bench"))
+BASELINE_PATH = os.getenv("BENCH_BASELINE", os.path.join(os.path.dirname(__file__), "data", "bench_baseline.json"))
+
+# The app must never reach the real Gemini API (or its cache) from here
+os.environ.pop("GEMINI_API_KEY", None)
+os.environ.setdefault("GEMINI_FAKE_LATENCY", "0.05")
+# A fresh response cache per run, so earlier runs' responses aren't served
+RUN_DIR = tempfile.mkdtemp(prefix="upskill-bench-")
+atexit.register(shutil.rmtree, RUN_DIR, ignore_errors=True)
+os.environ.setdefault("LLM_CACHE_PATH", os.path.join(RUN_DIR, "llm_cache.sqlite"))
+
+from artifact import build_bundle  # noqa: E402
+from ingest import UDEMY, UDEMY_PATH, load_udemy_courses  # noqa: E402
+from retrieval import rank  # noqa: E402
+from taxonomy import JOB_ROLE_MAPPING, get_relevant_subjects_and_skills  # noqa: E402
+
+ROLES = list(JOB_ROLE_MAPPING) + ["Cloud Architect", "Ethical Hacker", "Product Designer", "data person"]
+SKILL_SETS = [[], ["python", "sql"], ["leadership"], ["react", "docker", "aws"], ["excel"]]
+GOALS = [None, None, "beginner", "python", "design"]
+
+
+def synthetic_udemy_csv(n_courses, seed=0, directory=BENCH_DIR, source=UDEMY_PATH):
+    """Path of a ``n_courses``-row CSV in the Udemy schema, generated once.
+
+    Rows are resampled from the real catalog with two extra title words,
+    unique ids/URLs and jittered prices and audience numbers, so the text
+    and value distributions stay realistic.
+    """
+    path = os.path.join(directory, f"udemy_{n_courses}_{seed}.csv")
+    if os.path.exists(path):
+        return path
+    os.makedirs(directory, exist_ok=True)
+
+    base = pd.read_csv(source, dtype=UDEMY.dtypes)
+    rng = np.random.default_rng(seed)
+    df = base.iloc[rng.integers(0, len(base), n_courses)].reset_index(drop=True)
+    words = np.array(sorted({w for title in base["course_title"] for w in str(title).split() if w.isalpha()}))
+    extra = rng.choice(words, size=(n_courses, 2))
+    df["course_title"] = df["course_title"].astype(str) + " " + extra[:, 0] + " " + extra[:, 1]
+    df["course_id"] = np.arange(1, n_courses + 1)
+    df["url"] = "https://www.udemy.com/bench-" + df["course_id"].astype(str) + "/"
+    df["price"] = rng.choice(base["price"].to_numpy(), n_courses)
+    df["is_paid"] = np.where(df["price"] > 0, "True", "False")
+    df["num_subscribers"] = (df["num_subscribers"] * rng.lognormal(0, 0.5, n_courses)).astype("int64")
+    df["num_reviews"] = np.minimum(df["num_reviews"], df["num_subscribers"])
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    df.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+    return path
+
+
+def rss_mb():
+    """Current resident set size of this process in MiB"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, AttributeError):
+        import resource
+
+        # Peak rather than current RSS off Linux (KiB on Linux, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2**20 if sys.platform == "darwin" else peak / 1024
+
+
+def summarize(samples, elapsed=None):
+    """p50/p95/p99/mean in milliseconds for latencies given in seconds"""
+    ms = np.asarray(samples) * 1000
+    stats = {
+        "n": len(ms),
+        "p50": float(np.percentile(ms, 50)),
+        "p95": float(np.percentile(ms, 95)),
+        "p99": float(np.percentile(ms, 99)),
+        "mean": float(ms.mean()),
+    }
+    if elapsed:
+        stats["qps"] = len(ms) / elapsed
+    return stats
+
+
+def measure(fn, repeat):
+    """Call ``fn`` ``repeat`` times; one latency sample per call"""
+    samples = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn(i)
+        samples.append(time.perf_counter() - start)
+    return summarize(samples, sum(samples))
+
+
+@contextlib.contextmanager
+def quiet():
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def queries(count, seed=0):
+    """Deterministic mix of /recommendations parameters"""
+    rng = random.Random(seed)
+    mix = []
+    for _ in range(count):
+        params = {"job_role": rng.choice(ROLES)}
+        skills = rng.choice(SKILL_SETS)
+        if skills:
+            params["user_skills"] = ",".join(skills)
+        goal = rng.choice(GOALS)
+        if goal:
+            params["goal"] = goal
+        paid = rng.choice([None, None, True, False])
+        if paid is not None:
+            params["paid"] = str(paid).lower()
+        if rng.random() < 0.25:
+            params["platform"] = "udemy"
+        if rng.random() < 0.2:
+            params["limit"] = 20
+            params["fields"] = "title,url,rating"
+        mix.append(params)
+    return mix
+
+
+def micro_benchmarks(n_courses, repeat):
+    """Timings of the CPU paths on a synthetic catalog; returns (results, bundle)"""
+    path = synthetic_udemy_csv(n_courses)
+    sources = [("Udemy", load_udemy_courses, path)]
+    slow = max(1, repeat // 100) if n_courses >= 100_000 else max(1, repeat // 20)
+    results = {}
+
+    frames = []
+    results["load_udemy"] = measure(lambda i: frames.append(load_udemy_courses(path)), slow)
+    frame = frames[-1]
+    bundles = []
+    with quiet():
+        results["index_build"] = measure(
+            lambda i: bundles.append(build_bundle(sources, frame=frame, key=f"bench-{n_courses}")), slow
+        )
+    bundle = bundles[-1]
+    del frames[:-1], bundles[:-1]
+
+    mix = queries(repeat)
+    scoring_engine = bundle.scoring_engine
+
+    def score(i):
+        params = mix[i]
+        skills = params.get("user_skills", "").split(",") if params.get("user_skills") else []
+        subjects, _ = get_relevant_subjects_and_skills(params["job_role"])
+        rank(bundle, params["job_role"], None, None, subjects, skills, params.get("goal"), k=64)
+
+    results["score_query"] = measure(score, repeat)
+    results["skill_match"] = measure(
+        lambda i: bundle.skill_index.match_counts(SKILL_SETS[i % len(SKILL_SETS)]), repeat
+    )
+    results["goal_scan"] = measure(lambda i: scoring_engine._goal_column(f"goal {i}"), slow)
+    return results, bundle
+
+
+async def load_test(app, paths, concurrency):
+    """Request every path through ``app`` with ``concurrency`` clients"""
+    import httpx
+
+    latencies = []
+    errors = 0
+    pending = iter(paths)
+
+    async def client_loop(client):
+        nonlocal errors
+        for path, params in pending:
+            start = time.perf_counter()
+            response = await client.get(path, params=params)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return {**summarize(latencies, elapsed), "errors": errors}
+
+
+def http_benchmarks(bundle, requests, concurrency, ai_share=0.02):
+    """Load test the API endpoints against ``bundle``"""
+    with quiet():
+        import main
+        from index_manager import IndexManager
+
+    main.index_manager = IndexManager(bundle, sources=[], index_dir=BENCH_DIR)
+    rng = random.Random(1)
+    paths = []
+    for params in queries(requests, seed=1):
+        roll = rng.random()
+        if roll < 0.1:
+            paths.append((f"/career_path/{rng.choice(ROLES)}", None))
+        elif roll < 0.15:
+            paths.append((rng.choice(["/job_roles", "/platforms", "/skills"]), None))
+        else:
+            if rng.random() < ai_share:
+                params = {**params, "use_ai": "true"}
+            paths.append(("/recommendations", params))
+
+    results = {
+        "http_cold": asyncio.run(load_test(main.app, paths, concurrency)),
+        # Same requests again: served from the query caches
+        "http_warm": asyncio.run(load_test(main.app, paths, concurrency)),
+    }
+    results["career_path"] = measure(lambda i: main.career_path(bundle, f"{ROLES[i % len(ROLES)]} {i}"), requests)
+    return results
+
+
+def compare(results, baseline, tolerance, min_delta=0.1):
+    """Print changes against ``baseline``; True if any p50/p95 regressed.
+
+    Slowdowns below ``min_delta`` milliseconds are timer noise and never
+    count as regressions.
+    """
+    regressed = False
+    for size, metrics in results.items():
+        for name, stats in metrics.items():
+            before = baseline.get(size, {}).get(name)
+            if not isinstance(stats, dict) or not before:
+                continue
+            for stat in ("p50", "p95"):
+                if not before.get(stat):
+                    continue
+                change = stats[stat] / before[stat] - 1
+                flag = ""
+                if change > tolerance and stats[stat] - before[stat] > min_delta:
+                    flag = "  REGRESSION"
+                    regressed = True
+                print(f"{size:>8} {name:<12} {stat}: {before[stat]:9.3f} -> {stats[stat]:9.3f} ms ({change:+.1%}){flag}")
+    return regressed
+
+
+def print_results(size, metrics):
+    print(f"\n{size} courses (RSS {metrics['rss_mb']:.0f} MiB)")
+    for name, stats in metrics.items():
+        if not isinstance(stats, dict):
+            continue
+        qps = f"  {stats['qps']:9.1f} qps" if "qps" in stats else ""
+        errors = f"  {stats['errors']} errors" if stats.get("errors") else ""
+        print(
+            f"  {name:<12} n={stats['n']:<6} p50 {stats['p50']:9.3f}  p95 {stats['p95']:9.3f}  "
+            f"p99 {stats['p99']:9.3f} ms{qps}{errors}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the recommendation API")
+    parser.add_argument("--sizes", default="10000,100000", help="comma-separated catalog sizes (e.g. 10000,100000,1000000)")
+    parser.add_argument("--repeat", type=int, default=200, help="samples per micro benchmark")
+    parser.add_argument("--requests", type=int, default=2000, help="HTTP requests per load test")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--no-http", action="store_true", help="skip the ASGI load test")
+    parser.add_argument("--save", action="store_true", help=f"store results as the baseline ({BASELINE_PATH})")
+    parser.add_argument("--compare", action="store_true", help="compare with the stored baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed slowdown before --compare fails")
+    parser.add_argument("--min-delta", type=float, default=0.1, help="ignore slowdowns under this many ms")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for size in (int(s) for s in args.sizes.split(",")):
+        metrics, bundle = micro_benchmarks(size, args.repeat)
+        if not args.no_http:
+            metrics.update(http_benchmarks(bundle, args.requests, args.concurrency))
+        metrics["rss_mb"] = rss_mb()
+        results[str(size)] = metrics
+        print_results(size, metrics)
+        del bundle
+
+    status = 0
+    if args.compare:
+        try:
+            with open(BASELINE_PATH) as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"No usable baseline at {BASELINE_PATH}: {e}")
+            baseline = {}
+        print()
+        status = 1 if compare(results, baseline, args.tolerance, args.min_delta) else 0
+    if args.save:
+        baseline = {}
+        if os.path.exists(BASELINE_PATH):
+            with open(BASELINE_PATH) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        os.makedirs(os.path.dirname(BASELINE_PATH), exist_ok=True)
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(baseline, f, indent=1, sort_keys=True)
+        print(f"Saved baseline for {', '.join(results)} to {BASELINE_PATH}")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,215 @@
+"""Career graph: role transitions, skill gaps and multi-hop paths.
+
+Nodes are the ``JOB_ROLE_MAPPING`` roles plus every role they lead to;
+edges are their ``next_roles`` transitions. Each role has a row in a
+role x skill matrix, so the skill gap of every edge (skills of the target
+the source lacks) is one array operation. A step costs one plus its gap,
+and the cheapest route of up to ``MAX_PATH_STEPS`` steps between every
+pair of roles is precomputed with min-plus products. Every edge is also
+linked to the courses that best cover its gap, ranked for all edges in
+one batched scoring pass; the rankings are saved with the index artifact
+and otherwise computed on first use.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import Counter
+
+import numpy as np
+
+from taxonomy import JOB_ROLE_MAPPING, ROLES_BY_NAME, match_career_track, normalize_role, role_tokens
+
+# Longest route answered by ``CareerGraph.path``
+MAX_PATH_STEPS = 3
+# Courses linked to each step
+STEP_COURSES = 4
+
+
+def role_requirements(job_role):
+    """(subjects, skills) expected of a role.
+
+    Mapped roles use their own lists. Other roles combine every mapped role
+    whose name they contain ("Senior Data Scientist") with their career
+    track's skills and subjects.
+    """
+    role = ROLES_BY_NAME.get(normalize_role(job_role))
+    if role is not None:
+        return JOB_ROLE_MAPPING[role]["subjects"], JOB_ROLE_MAPPING[role]["skills"]
+
+    tokens = set(role_tokens(job_role))
+    contained = [data for name, data in JOB_ROLE_MAPPING.items() if set(role_tokens(name)) <= tokens]
+    _, _, track_skills, track_subjects = match_career_track(normalize_role(job_role))
+    subjects = [subject for data in contained for subject in data["subjects"]] + track_subjects
+    skills = [skill for data in contained for skill in data["skills"]] + track_skills
+    return list(dict.fromkeys(subjects)), list(dict.fromkeys(skills))
+
+
+class CareerGraph:
+    """Role transitions as a weighted adjacency matrix with cached routes"""
+
+    def __init__(self, course_index, scoring_engine):
+        self.course_index = course_index
+        self.scoring_engine = scoring_engine
+
+        next_roles = [role for data in JOB_ROLE_MAPPING.values() for role in data["next_roles"]]
+        self.roles = list(dict.fromkeys([*JOB_ROLE_MAPPING, *next_roles]))
+        self.ids = {}
+        for i, role in enumerate(self.roles):
+            self.ids.setdefault(normalize_role(role), i)
+        # Word -> roles containing it, for roles outside the graph
+        self.role_words = [set(role_tokens(role)) for role in self.roles]
+        self.roles_by_word = {}
+        for i, words in enumerate(self.role_words):
+            for word in words:
+                self.roles_by_word.setdefault(word, []).append(i)
+
+        requirements = [role_requirements(role) for role in self.roles]
+        self.subjects = [subjects for subjects, _ in requirements]
+        self.skills = list(dict.fromkeys(skill for _, skills in requirements for skill in skills))
+        skill_ids = {skill: j for j, skill in enumerate(self.skills)}
+        self.skill_matrix = np.zeros((len(self.roles), len(self.skills)), dtype=bool)
+        for i, (_, skills) in enumerate(requirements):
+            self.skill_matrix[i, [skill_ids[skill] for skill in skills]] = True
+
+        edges = dict.fromkeys(
+            (self.ids[normalize_role(role)], self.ids[normalize_role(target)])
+            for role, data in JOB_ROLE_MAPPING.items()
+            for target in data["next_roles"]
+        )
+        edges = [(source, target) for source, target in edges if source != target]
+        self.edge_ids = {edge: e for e, edge in enumerate(edges)}
+        sources = np.array([source for source, _ in edges], dtype=np.intp)
+        targets = np.array([target for _, target in edges], dtype=np.intp)
+        gaps = self.skill_matrix[targets] & ~self.skill_matrix[sources]
+        self.edge_gaps = [[self.skills[j] for j in np.flatnonzero(gap)] for gap in gaps]
+        # The graph has under a hundred roles, so a dense matrix with inf for
+        # missing edges is both the adjacency structure and the min-plus input
+        self.weights = np.full((len(self.roles),) * 2, np.inf)
+        self.weights[sources, targets] = 1.0 + gaps.sum(axis=1)
+
+        self._cost, self._via = self._shortest_paths()
+        # Inputs of the edge rankings; saved rankings are reused only if
+        # they were computed from the same ones
+        self._edge_queries = (
+            [self.roles[target] for _, target in edges], [self.subjects[target] for _, target in edges], self.edge_gaps,
+        )
+        self.edge_digest = hashlib.sha256(json.dumps(self._edge_queries).encode("utf-8")).hexdigest()[:16]
+        self._edge_courses = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.roles)
+
+    @property
+    def edge_courses(self):
+        """Best course rows per edge, ranked on first use unless restored"""
+        if self._edge_courses is None:
+            with self._lock:
+                if self._edge_courses is None:
+                    self._edge_courses = self.rank_courses(*self._edge_queries)
+        return self._edge_courses
+
+    def save(self, path):
+        """Write the edge rankings under ``path`` as ``.npy`` arrays"""
+        os.makedirs(path, exist_ok=True)
+        rows = self.edge_courses
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(r) for r in rows], out=offsets[1:])
+        np.save(os.path.join(path, "edge_courses.offsets.npy"), offsets)
+        np.save(os.path.join(path, "edge_courses.rows.npy"), np.concatenate(rows or [[]]).astype(np.intp))
+        with open(os.path.join(path, "career.json"), "w") as f:
+            json.dump({"edge_digest": self.edge_digest}, f)
+
+    def restore(self, path, mmap_mode="r"):
+        """Use the edge rankings saved under ``path`` if they match this graph's edges"""
+        try:
+            with open(os.path.join(path, "career.json")) as f:
+                if json.load(f).get("edge_digest") != self.edge_digest:
+                    return False
+            offsets = np.load(os.path.join(path, "edge_courses.offsets.npy"))
+            rows = np.load(os.path.join(path, "edge_courses.rows.npy"), mmap_mode=mmap_mode)
+        except (OSError, ValueError):
+            return False
+        self._edge_courses = [rows[offsets[e]:offsets[e + 1]] for e in range(len(offsets) - 1)]
+        return True
+
+    def _shortest_paths(self):
+        """Cheapest cost and last hop of every route of at most 1..MAX_PATH_STEPS steps"""
+        n = len(self.roles)
+        weights = self.weights
+        cost = [weights]
+        via = [np.where(np.isfinite(weights), np.arange(n)[:, None], -1)]
+        for _ in range(1, MAX_PATH_STEPS):
+            # through[i, k, j]: best route to k, then the edge k -> j
+            through = cost[-1][:, :, None] + weights[None, :, :]
+            last = through.argmin(axis=1)
+            best = np.take_along_axis(through, last[:, None, :], axis=1)[:, 0, :]
+            better = best < cost[-1]
+            cost.append(np.where(better, best, cost[-1]))
+            via.append(np.where(better, last, via[-1]))
+        return cost, via
+
+    def find(self, job_role):
+        """Graph role for ``job_role``: its own node, else the one sharing most words"""
+        i = self.ids.get(normalize_role(job_role))
+        if i is not None:
+            return i
+        shared = Counter(i for word in set(role_tokens(job_role)) for i in self.roles_by_word.get(word, ()))
+        if not shared:
+            return None
+        return max(shared, key=lambda i: (shared[i], -len(self.role_words[i]), -i))
+
+    def path(self, source, target, max_steps=MAX_PATH_STEPS):
+        """Role ids of the cheapest route of at most ``max_steps`` steps, or ``None``"""
+        if source == target:
+            return [source]
+        if max_steps < 1:
+            return None
+        h = min(max_steps, MAX_PATH_STEPS) - 1
+        if not np.isfinite(self._cost[h][source, target]):
+            return None
+        route = [target]
+        while route[-1] != source:
+            route.append(int(self._via[h][source, route[-1]]))
+            h -= 1
+        return route[::-1]
+
+    def step(self, source, target):
+        """(skill gap, course rows) of the edge ``source`` -> ``target``"""
+        edge = self.edge_ids[(source, target)]
+        return self.edge_gaps[edge], self.edge_courses[edge]
+
+    def next_steps(self, job_role, next_roles):
+        """(role, skill gap, course rows) for each of ``next_roles`` after ``job_role``.
+
+        Graph edges are precomputed; other transitions (free-text roles) are
+        ranked on demand.
+        """
+        source = self.ids.get(normalize_role(job_role))
+        steps = [None] * len(next_roles)
+        missing = []
+        for n, role in enumerate(next_roles):
+            edge = (source, self.ids.get(normalize_role(role)))
+            if edge in self.edge_ids:
+                steps[n] = (role, *self.step(*edge))
+            else:
+                missing.append(n)
+        if missing:
+            have = {skill.lower() for skill in role_requirements(job_role)[1]}
+            requirements = [role_requirements(next_roles[n]) for n in missing]
+            gaps = [[skill for skill in skills if skill.lower() not in have] for _, skills in requirements]
+            courses = self.rank_courses([next_roles[n] for n in missing], [s for s, _ in requirements], gaps)
+            for n, gap, rows in zip(missing, gaps, courses):
+                steps[n] = (next_roles[n], gap, rows)
+        return steps
+
+    def rank_courses(self, roles, subjects, skill_lists, k=STEP_COURSES):
+        """Best ``k`` rows per target role, favouring courses covering its skill list"""
+        if not roles:
+            return []
+        queries = self.course_index.vectorizer.transform(roles)
+        ranked = self.scoring_engine.rank_batch(
+            self.course_index.X, queries, subjects, skill_lists, [None] * len(roles), k
+        )
+        return [rows for [(rows, _)] in ranked]
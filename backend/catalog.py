@@ -0,0 +1,332 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from fastjson import RawJSON, dumps
+
+# Column order of a serialised course; "description" is synthesised per row
+COURSE_FIELDS = (
+    "title", "provider", "url", "is_paid", "price", "num_subscribers", "level",
+    "duration", "subject", "description", "popularity_score", "platform", "rating",
+)
+
+# Filled in from the enrichment store; empty for courses not enriched yet
+ENRICHED_COLUMNS = ("ai_description", "ai_skills", "difficulty")
+
+# Columns stored as categorical codes instead of one string per course
+CATEGORICAL_COLUMNS = ("provider", "level", "duration", "subject", "platform", "difficulty")
+
+CATALOG_DTYPES = {
+    "title": object,
+    "url": object,
+    "is_paid": bool,
+    "num_subscribers": "int64",
+    "num_lectures": "Int64",
+    "popularity_score": "float64",
+    "rating": "float64",
+}
+
+# Free-text columns, stored as one UTF-8 buffer plus offsets
+STRING_COLUMNS = ("title", "url", "ai_description", "ai_skills")
+# Nullable integer columns, stored with -1 for missing values
+NULLABLE_COLUMNS = ("num_lectures",)
+
+# Every stored column (the serialised fields minus "description", plus the
+# inputs needed to synthesise it)
+CATALOG_COLUMNS = tuple(f for f in COURSE_FIELDS if f != "description") + ("num_lectures",) + ENRICHED_COLUMNS
+
+DESCRIPTION_TEMPLATES = {
+    "udemy": "{level} course in {subject} with {num_lectures} lectures. {num_subscribers} students enrolled.",
+    "coursera": "{level} course in {subject} on Coursera. {duration} duration.",
+}
+DEFAULT_DESCRIPTION_TEMPLATE = "{level} course in {subject}."
+
+
+def catalog_frame(data):
+    """Coerce loader output to the catalog schema (dtypes + categoricals)"""
+    frame = pd.DataFrame(data, columns=CATALOG_COLUMNS)
+    for column in ("price", "num_subscribers"):
+        frame[column] = pd.to_numeric(frame[column], errors="coerce")
+    frame["num_subscribers"] = frame["num_subscribers"].fillna(0)
+    for column in ENRICHED_COLUMNS:
+        frame[column] = frame[column].astype(object).fillna("")
+    for column in CATEGORICAL_COLUMNS:
+        frame[column] = frame[column].astype(str).astype("category")
+    for column, dtype in CATALOG_DTYPES.items():
+        frame[column] = frame[column].astype(dtype)
+    return frame
+
+
+def _python_value(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+class StringColumn:
+    """Strings packed into one UTF-8 buffer plus an offsets array.
+
+    Both arrays are plain NumPy buffers, so they can be memory-mapped and
+    shared between worker processes without per-string Python objects.
+    """
+
+    def __init__(self, offsets, data):
+        self.offsets = offsets
+        self.data = data
+
+    @classmethod
+    def from_values(cls, values):
+        return cls.from_bytes([str(v).encode("utf-8") for v in values])
+
+    @classmethod
+    def from_bytes(cls, encoded):
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(offsets, data)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row):
+        return self.raw(row).decode("utf-8")
+
+    def raw(self, row):
+        return self.data[self.offsets[row]:self.offsets[row + 1]].tobytes()
+
+    def to_array(self):
+        return np.array([self[row] for row in range(len(self))], dtype=object)
+
+    def contains(self, text):
+        """Boolean array: which rows contain ``text``, searched in the packed buffer.
+
+        Candidate start positions are narrowed one byte of ``text`` at a time,
+        then mapped to rows; matches running into the next row are dropped.
+        """
+        needle = text.encode("utf-8")
+        found = np.zeros(len(self), dtype=bool)
+        if not needle:
+            found[:] = True
+            return found
+        if len(needle) > len(self.data):
+            return found
+        starts = np.flatnonzero(self.data[:len(self.data) - len(needle) + 1] == needle[0])
+        for i in range(1, len(needle)):
+            starts = starts[self.data[starts + i] == needle[i]]
+        rows = np.searchsorted(self.offsets, starts, side="right") - 1
+        found[rows[starts + len(needle) <= self.offsets[rows + 1]]] = True
+        return found
+
+
+class Catalog:
+    """Columnar course store shared by every endpoint.
+
+    Each field is a NumPy array (categorical fields as integer codes plus a
+    small list of categories, free text as a packed ``StringColumn``), so
+    filtering and scoring work on arrays and a saved catalog can be
+    memory-mapped. Each course is also kept as a pre-encoded JSON object
+    (``fragments``), so full-field responses are assembled from bytes;
+    per-course dicts are only produced for field subsets. Lowercase title
+    and skill-matching text are packed too (``search``), so goal and skill
+    lookups scan one shared buffer instead of a string object per course.
+    """
+
+    def __init__(self, frame=None):
+        self.size = 0
+        self.codes = {}
+        self.categories = {}
+        self.arrays = {}
+        self.fragments = None
+        self.search = {}
+        if frame is None:
+            return
+        self.size = len(frame)
+        for column in frame.columns:
+            series = frame[column]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                self.codes[column] = series.cat.codes.to_numpy()
+                self.categories[column] = [str(c) for c in series.cat.categories]
+            elif column in STRING_COLUMNS:
+                self.arrays[column] = StringColumn.from_values(series)
+            elif column in NULLABLE_COLUMNS:
+                self.arrays[column] = series.fillna(-1).to_numpy(dtype=np.int64)
+            else:
+                self.arrays[column] = series.to_numpy()
+        self.fragments = self.build_fragments()
+        self.search = {
+            "title": StringColumn.from_values([str(title).lower() for title in self.column("title").tolist()]),
+            "skill_text": StringColumn.from_values(self.skill_texts()),
+        }
+
+    def build_fragments(self):
+        """Every course as a JSON object of ``COURSE_FIELDS``, packed like a string column"""
+        columns = [self.column(name).tolist() for name in COURSE_FIELDS]
+        return StringColumn.from_bytes([dumps(dict(zip(COURSE_FIELDS, values))) for values in zip(*columns)])
+
+    def save(self, path):
+        """Write every column as an ``.npy`` file under ``path``"""
+        os.makedirs(path, exist_ok=True)
+        for column, codes in self.codes.items():
+            np.save(os.path.join(path, f"{column}.codes.npy"), codes)
+        for column, array in self.arrays.items():
+            if isinstance(array, StringColumn):
+                np.save(os.path.join(path, f"{column}.offsets.npy"), array.offsets)
+                np.save(os.path.join(path, f"{column}.data.npy"), array.data)
+            else:
+                np.save(os.path.join(path, f"{column}.npy"), array)
+        np.save(os.path.join(path, "fragments.offsets.npy"), self.fragments.offsets)
+        np.save(os.path.join(path, "fragments.data.npy"), self.fragments.data)
+        for name, column in self.search.items():
+            np.save(os.path.join(path, f"search.{name}.offsets.npy"), column.offsets)
+            np.save(os.path.join(path, f"search.{name}.data.npy"), column.data)
+        meta = {
+            "size": self.size,
+            "categories": self.categories,
+            "columns": [c for c in self.arrays if not isinstance(self.arrays[c], StringColumn)],
+            "string_columns": [c for c in self.arrays if isinstance(self.arrays[c], StringColumn)],
+            "search_columns": list(self.search),
+        }
+        with open(os.path.join(path, "catalog.json"), "w") as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, path, mmap_mode="r"):
+        """Load a saved catalog, memory-mapping its arrays by default"""
+        with open(os.path.join(path, "catalog.json")) as f:
+            meta = json.load(f)
+
+        def load_array(name):
+            return np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+
+        catalog = cls()
+        catalog.size = meta["size"]
+        catalog.categories = meta["categories"]
+        catalog.codes = {column: load_array(f"{column}.codes") for column in meta["categories"]}
+        catalog.arrays = {column: load_array(column) for column in meta["columns"]}
+        for column in meta["string_columns"]:
+            catalog.arrays[column] = StringColumn(load_array(f"{column}.offsets"), load_array(f"{column}.data"))
+        catalog.fragments = StringColumn(load_array("fragments.offsets"), load_array("fragments.data"))
+        catalog.search = {
+            name: StringColumn(load_array(f"search.{name}.offsets"), load_array(f"search.{name}.data"))
+            for name in meta["search_columns"]
+        }
+        return catalog
+
+    @classmethod
+    def concat(cls, frames):
+        """Build one catalog from several provider frames"""
+        frames = [f for f in frames if len(f)]
+        if not frames:
+            return cls(catalog_frame([]))
+        return cls(catalog_frame(pd.concat(frames, ignore_index=True)))
+
+    def __len__(self):
+        return self.size
+
+    def column(self, name):
+        """Full column as an array (categoricals are decoded)"""
+        if name == "description":
+            return np.array(self.descriptions(), dtype=object)
+        if name in self.codes:
+            return np.asarray(self.categories[name], dtype=object)[self.codes[name]]
+        if isinstance(self.arrays[name], StringColumn):
+            return self.arrays[name].to_array()
+        return self.arrays[name]
+
+    def value(self, name, row):
+        if name == "description":
+            return self.description(row)
+        if name in self.codes:
+            return self.categories[name][self.codes[name][row]]
+        value = _python_value(self.arrays[name][row])
+        if name in NULLABLE_COLUMNS and value < 0:
+            return None
+        return value
+
+    def description(self, row):
+        enriched = self.value("ai_description", row)
+        if enriched:
+            return enriched
+        template = DESCRIPTION_TEMPLATES.get(self.value("platform", row), DEFAULT_DESCRIPTION_TEMPLATE)
+        return template.format(
+            level=self.value("level", row),
+            subject=self.value("subject", row),
+            duration=self.value("duration", row),
+            num_lectures=self.value("num_lectures", row),
+            num_subscribers=self.value("num_subscribers", row),
+        )
+
+    def descriptions(self):
+        """``description`` for every row, reading each column once"""
+        lectures = [None if n < 0 else n for n in self.arrays["num_lectures"].tolist()]
+        rows = zip(
+            *(self.column(name).tolist() for name in ("platform", "level", "subject", "duration", "num_subscribers")),
+            lectures,
+            self.column("ai_description").tolist(),
+        )
+        return [
+            enriched or DESCRIPTION_TEMPLATES.get(platform, DEFAULT_DESCRIPTION_TEMPLATE).format(
+                level=level, subject=subject, duration=duration, num_lectures=num_lectures, num_subscribers=subscribers,
+            )
+            for platform, level, subject, duration, subscribers, num_lectures, enriched in rows
+        ]
+
+    def skill_texts(self):
+        """Lowercase title + description (+ AI skills) per course, what skills are matched in"""
+        # Matched case-insensitively, like the old substring scan
+        texts = zip(self.column("title").tolist(), self.descriptions(), self.column("ai_skills").tolist())
+        return [
+            f"{title} {description} {skills}".lower() if skills else f"{title} {description}".lower()
+            for title, description, skills in texts
+        ]
+
+    def unique(self, name):
+        """Distinct values of a categorical column that actually occur"""
+        present = np.unique(self.codes[name])
+        return [self.categories[name][code] for code in present if code >= 0]
+
+    def enriched_count(self):
+        """Courses with a stored enrichment"""
+        lengths = np.diff(self.arrays["ai_description"].offsets) + np.diff(self.arrays["ai_skills"].offsets)
+        return int(np.count_nonzero(lengths))
+
+    def enrichment(self, row):
+        """Stored AI skills and difficulty of a course, or ``None`` if it isn't enriched"""
+        skills = self.value("ai_skills", row)
+        if not skills and not self.value("ai_description", row):
+            return None
+        return {"skills": skills.split(", ") if skills else [], "difficulty": self.value("difficulty", row) or None}
+
+    def course(self, row):
+        return CourseView(self, row)
+
+    def records(self, rows, fields=None):
+        """Serialise ``rows`` as plain course dicts, optionally only ``fields``"""
+        return [CourseView(self, row).to_dict(fields) for row in rows]
+
+    def records_json(self, rows, fields=None):
+        """``records`` as one encoded JSON array; all fields come from ``fragments``"""
+        if fields:
+            return RawJSON(dumps(self.records(rows, fields)))
+        raw = self.fragments.raw
+        return RawJSON(b"[" + b",".join([raw(row) for row in rows]) + b"]")
+
+
+class CourseView:
+    """Lightweight read-only view of one catalog row"""
+
+    __slots__ = ("catalog", "row")
+
+    def __init__(self, catalog, row):
+        self.catalog = catalog
+        self.row = int(row)
+
+    def __getitem__(self, name):
+        if name not in COURSE_FIELDS:
+            raise KeyError(name)
+        return self.catalog.value(name, self.row)
+
+    def to_dict(self, fields=None):
+        return {name: self.catalog.value(name, self.row) for name in fields or COURSE_FIELDS}
@@ -0,0 +1,123 @@
+"""Parsed course enrichments (description, skills, difficulty) in SQLite.
+
+The bulk enrichment worker (``python enrichment.py enrich``) writes here
+after every batch, which is also its checkpoint: a restarted run skips the
+courses already stored. Catalog builds merge the stored enrichments into
+the catalog frame, so they feed the TF-IDF corpus and the skill index.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+ENRICHMENT_PATH = os.getenv(
+    "ENRICHMENT_PATH", os.path.join(os.path.dirname(__file__), "data", "enrichment.sqlite")
+)
+# Course fields the enrichment prompt sees, and so what an enrichment is keyed on
+KEY_FIELDS = ("title", "subject", "level", "duration")
+
+
+def course_keys(titles, subjects, levels, durations):
+    """Enrichment key per course: the prompt fields, case- and whitespace-normalised"""
+    parts = [pd.Series(values, dtype=object).astype(str).str.split().str.join(" ").str.casefold()
+             for values in (titles, subjects, levels, durations)]
+    keys = parts[0]
+    for part in parts[1:]:
+        keys = keys + "\x1f" + part
+    return keys.tolist()
+
+
+class EnrichmentStore:
+    """Enrichments by course key, shared by the worker and index builds"""
+
+    def __init__(self, path=ENRICHMENT_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    @property
+    def _db(self):
+        # One connection per process, as with the response cache
+        if self._conn is None or self._pid != os.getpid():
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS enrichments ("
+                "key TEXT PRIMARY KEY, model TEXT NOT NULL, description TEXT NOT NULL, skills TEXT NOT NULL, "
+                "difficulty TEXT NOT NULL, target_audience TEXT NOT NULL, learning_outcomes TEXT NOT NULL, "
+                "updated REAL NOT NULL)"
+            )
+            self._pid = os.getpid()
+        return self._conn
+
+    def exists(self):
+        return self.path == ":memory:" or os.path.exists(self.path)
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM enrichments").fetchone()[0]
+
+    def keys(self):
+        with self._lock:
+            return {row[0] for row in self._db.execute("SELECT key FROM enrichments")}
+
+    def put_many(self, entries, model):
+        """Store ``(key, enrichment)`` pairs in one transaction"""
+        now = time.time()
+        rows = [
+            (
+                key, model, enrichment["description"], json.dumps(enrichment["skills"]), enrichment["difficulty"],
+                enrichment["target_audience"], json.dumps(enrichment["learning_outcomes"]), now,
+            )
+            for key, enrichment in entries
+        ]
+        with self._lock, self._db:
+            self._db.executemany("INSERT OR REPLACE INTO enrichments VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def all(self):
+        """{key: enrichment} for every stored course"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key, description, skills, difficulty, target_audience, learning_outcomes FROM enrichments"
+            ).fetchall()
+        return {
+            key: {
+                "description": description,
+                "skills": json.loads(skills),
+                "difficulty": difficulty,
+                "target_audience": audience,
+                "learning_outcomes": json.loads(outcomes),
+            }
+            for key, description, skills, difficulty, audience, outcomes in rows
+        }
+
+    def fingerprint(self):
+        """Changes whenever an enrichment is added or replaced; ``None`` without a store"""
+        if not self.exists():
+            return None
+        with self._lock:
+            count, last_row, last_update = self._db.execute(
+                "SELECT COUNT(*), MAX(rowid), MAX(updated) FROM enrichments"
+            ).fetchone()
+        return f"{count}:{last_row}:{last_update}"
+
+
+def apply_enrichment(frame, store):
+    """Fill the catalog frame's ``ai_*``/``difficulty`` columns from ``store``"""
+    if not len(frame) or not store.exists():
+        return frame
+    enrichments = store.all()
+    if not enrichments:
+        return frame
+    keys = course_keys(*(frame[field] for field in KEY_FIELDS))
+    found = [enrichments.get(key) for key in keys]
+    frame = frame.copy()
+    frame["ai_description"] = [e["description"] if e else "" for e in found]
+    frame["ai_skills"] = [", ".join(e["skills"]) if e else "" for e in found]
+    frame["difficulty"] = pd.Series([e["difficulty"] if e else "" for e in found], index=frame.index).astype("category")
+    return frame
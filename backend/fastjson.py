@@ -0,0 +1,54 @@
+"""Compact JSON encoding for API responses.
+
+``dumps`` uses orjson when it is installed and the stdlib encoder
+otherwise; both produce compact UTF-8 and accept NumPy values. JSON that
+was encoded ahead of time (course fragments, static lists) is wrapped in
+``RawJSON`` and ``encode`` splices it into the output as bytes.
+"""
+import json
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(value):
+    """``value`` as compact UTF-8 JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class RawJSON:
+    """Already encoded JSON, copied into the output unchanged"""
+
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        self.data = data
+
+
+def _nested(items):
+    return any(isinstance(item, (RawJSON, dict, list, tuple)) for item in items)
+
+
+def encode(value):
+    """Like ``dumps``, but dicts and lists may contain ``RawJSON`` values"""
+    if isinstance(value, RawJSON):
+        return value.data
+    if isinstance(value, dict) and _nested(value.values()):
+        return b"{" + b",".join(dumps(str(key)) + b":" + encode(item) for key, item in value.items()) + b"}"
+    if isinstance(value, (list, tuple)) and _nested(value):
+        return b"[" + b",".join(encode(item) for item in value) + b"]"
+    return dumps(value)
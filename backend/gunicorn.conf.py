@@ -0,0 +1,19 @@
+"""Gunicorn settings for production: gunicorn -c gunicorn.conf.py main:app"""
+import gc
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", min(4, multiprocessing.cpu_count())))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import main.py once in the master so the catalog and TF-IDF index (which
+# are memory-mapped from the index artifact) are shared by every worker
+# instead of being rebuilt per process.
+preload_app = True
+
+
+def when_ready(server):
+    # Move everything created while preloading out of the collector's reach so
+    # GC passes in the workers don't write to (and un-share) those pages.
+    gc.freeze()
@@ -0,0 +1,122 @@
+import os
+import threading
+import time
+
+from artifact import INDEX_DIR, load_bundle, load_or_build
+from enrichment_store import ENRICHMENT_PATH
+from index_manifest import published_key
+from ingest import SOURCES
+from logs import get_logger
+
+log = get_logger("index")
+
+
+def sources_fingerprint(sources=SOURCES):
+    """Cheap change detector for the source files and enrichment store (size + mtime)"""
+    fingerprint = []
+    for path in [path for _, _, path in sources] + [ENRICHMENT_PATH]:
+        try:
+            stat = os.stat(path)
+            fingerprint.append((path, stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            fingerprint.append((path, None, None))
+    return tuple(fingerprint)
+
+
+class IndexManager:
+    """Holds the live index generation and swaps in new ones.
+
+    Request handlers read ``current`` once and keep using that bundle until
+    they return, so a reload never changes the data under a running request.
+    New generations are built on a background thread and published with a
+    single reference assignment. Reload state is per process: other
+    processes sharing ``index_dir`` pick up the new artifact through
+    ``watch``, which follows the published key.
+    """
+
+    def __init__(self, bundle, sources=SOURCES, index_dir=INDEX_DIR):
+        bundle.generation = 1
+        self.current = bundle
+        self.sources = sources
+        self.index_dir = index_dir
+        self.fingerprint = sources_fingerprint(sources)
+        self.last_error = None
+        # Published key that could not be loaded (pruned, or another version)
+        self._unloadable_key = None
+        self._lock = threading.Lock()
+        self._thread = None
+        self._watcher = None
+
+    @property
+    def reloading(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def reload(self, key=None):
+        """Rebuild from the sources (incrementally if possible) and swap it in.
+
+        With ``key``, load the artifact another process published instead.
+        """
+        previous = self.current
+        fingerprint = sources_fingerprint(self.sources)
+        try:
+            if key is None:
+                bundle = load_or_build(self.sources, index_dir=self.index_dir, previous=previous)
+            else:
+                bundle = load_bundle(key, self.index_dir)
+        except Exception as e:
+            self.last_error = str(e)
+            log.error("index_reload_failed", error=str(e))
+            return previous
+        if bundle is None:
+            self._unloadable_key = key
+            log.warning("index_follow_skipped", key=key)
+            return previous
+        self.last_error = None
+        self.fingerprint = fingerprint
+        if bundle.key == previous.key:
+            return previous
+        bundle.generation = previous.generation + 1
+        self.current = bundle
+        log.info("index_swapped", generation=bundle.generation, key=bundle.key, courses=len(bundle.catalog))
+        return bundle
+
+    def reload_in_background(self, key=None):
+        """Start a reload thread unless one is already running"""
+        with self._lock:
+            if self.reloading:
+                return False
+            self._thread = threading.Thread(target=self.reload, args=(key,), name="index-reload", daemon=True)
+            self._thread.start()
+            return True
+
+    def watch(self, interval, sources=True):
+        """Follow the published artifact key and, with ``sources``, the source files.
+
+        Both are polled every ``interval`` seconds.
+        """
+        if self._watcher is not None:
+            return
+
+        def poll():
+            while True:
+                time.sleep(interval)
+                key = published_key(self.index_dir)
+                if key is not None and key != self.current.key and key != self._unloadable_key:
+                    self.reload_in_background(key)
+                elif sources and sources_fingerprint(self.sources) != self.fingerprint:
+                    self.reload_in_background()
+
+        self._watcher = threading.Thread(target=poll, name="index-watcher", daemon=True)
+        self._watcher.start()
+
+    def status(self):
+        bundle = self.current
+        return {
+            "generation": bundle.generation,
+            "key": bundle.key,
+            "total_courses": len(bundle.catalog),
+            "stale_rows": bundle.stale_rows,
+            "enriched_courses": bundle.enriched_courses,
+            "reloading": self.reloading,
+            "last_error": self.last_error,
+        }
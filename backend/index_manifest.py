@@ -0,0 +1,51 @@
+"""Where index artifacts live, their manifests and the published key.
+
+Only the standard library is imported here, so a lazily starting app can
+read the last built artifact's manifest (course count, job roles,
+platforms) before pandas, scikit-learn or the index itself are loaded.
+"""
+import json
+import os
+import tempfile
+
+INDEX_DIR = os.getenv("INDEX_DIR", os.path.join(os.path.dirname(__file__), "data", "index"))
+MANIFEST = "manifest.json"
+# Key of the artifact written last by any process. Workers poll it, so a
+# reload done by one gunicorn worker reaches the others (dot-prefixed, so
+# pruning keeps it)
+CURRENT = ".current"
+
+
+def latest_manifest(index_dir=INDEX_DIR):
+    """Manifest of the most recently built artifact in ``index_dir``, or ``None``"""
+    try:
+        entries = os.listdir(index_dir)
+    except OSError:
+        return None
+    manifests = []
+    for entry in entries:
+        if entry.startswith("."):
+            continue
+        try:
+            with open(os.path.join(index_dir, entry, MANIFEST)) as f:
+                manifests.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return max(manifests, key=lambda manifest: manifest.get("built_at", 0), default=None)
+
+
+def published_key(index_dir=INDEX_DIR):
+    """Key of the latest published artifact, or ``None``"""
+    try:
+        with open(os.path.join(index_dir, CURRENT)) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def publish_key(key, index_dir=INDEX_DIR):
+    """Atomically record ``key`` as the latest artifact"""
+    fd, tmp = tempfile.mkstemp(prefix=".current-", dir=index_dir)
+    with os.fdopen(fd, "w") as f:
+        f.write(key)
+    os.replace(tmp, os.path.join(index_dir, CURRENT))
@@ -0,0 +1,411 @@
+"""Course ingestion: provider adapters, chunked CSV reads and cross-provider dedup.
+
+Each provider is a ``ProviderAdapter`` declaring which source columns feed
+which catalog fields (with alias chains and defaults) and a ``build``
+function turning those columns into catalog fields. Sources are
+``(name, adapter, path)`` tuples; ``load_catalog_frame`` parses them (in a
+process pool when they are large) into one catalog-schema frame.
+
+The default sources are the bundled Udemy and Coursera CSVs. Point
+``CATALOG_SOURCES`` at a JSON file to use others::
+
+    [{"name": "Udemy", "adapter": "udemy", "path": "udemy_courses.csv"},
+     {"name": "edX", "adapter": "generic", "path": "edx.csv", "platform": "edx",
+      "columns": {"title": ["course_title", "name"], "subject": ["category"]}}]
+
+Relative paths are resolved against the JSON file's directory.
+"""
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from catalog import catalog_frame
+from enrichment_store import ENRICHMENT_PATH, EnrichmentStore, apply_enrichment
+from logs import get_logger
+from metrics import record
+
+log = get_logger("ingest")
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+UDEMY_PATH = os.path.join(DATA_DIR, "udemy_courses.csv")
+COURSERA_PATH = os.path.join(DATA_DIR, "Coursera.csv")
+
+# Files larger than this are read in chunks of INGEST_CHUNK_ROWS rows
+INGEST_CHUNK_BYTES = int(os.getenv("INGEST_CHUNK_BYTES", str(256 * 2**20)))
+INGEST_CHUNK_ROWS = int(os.getenv("INGEST_CHUNK_ROWS", "200000"))
+# Parse sources in parallel once they add up to this many bytes;
+# INGEST_WORKERS caps the pool (0 = one per source, up to the CPU count)
+INGEST_PARALLEL_BYTES = int(os.getenv("INGEST_PARALLEL_BYTES", str(64 * 2**20)))
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "0"))
+# Drop courses whose normalised title already came from an earlier provider
+INGEST_DEDUP = os.getenv("INGEST_DEDUP", "1").lower() not in ("0", "false", "no")
+
+
+class _Required:
+    def __repr__(self):
+        return "REQUIRED"
+
+
+# Default marking a column the source must have
+REQUIRED = _Required()
+
+# Text read as true from boolean columns, compared case-insensitively (what
+# pandas' own bool parsing accepts, plus 1/yes)
+TRUE_VALUES = frozenset({"true", "1", "1.0", "yes"})
+
+
+def resolve_column(df, aliases, default):
+    """First column of ``df`` named in ``aliases``, or a constant column"""
+    for name in aliases:
+        if name in df.columns:
+            return df[name]
+    return pd.Series(default, index=df.index)
+
+
+def truthy(values):
+    """Boolean column from text flags such as ``True``, ``TRUE``, ``true`` or ``1``"""
+    return values.astype(str).str.strip().str.lower().isin(TRUE_VALUES).to_numpy(dtype=bool)
+
+
+def hours_label(values):
+    """Append " hours" to durations that don't already mention hours"""
+    labels = values.astype(object).map(str)
+    if pd.api.types.is_numeric_dtype(values):
+        return labels + " hours"
+    has_unit = labels.str.lower().str.contains("hour", regex=False) & values.notna()
+    return labels.where(has_unit, labels + " hours")
+
+
+class ProviderAdapter:
+    """How one provider's CSV export maps onto the catalog schema.
+
+    ``columns`` maps each input name used by ``build`` to (source column
+    aliases in priority order, default); a ``REQUIRED`` default makes a
+    missing column an error. ``dtypes`` are ``read_csv`` dtypes by source
+    column. Only the mapped columns are read.
+
+    Files over ``INGEST_CHUNK_BYTES`` are read and converted in chunks, so
+    type inference (e.g. numeric vs text prices) happens per chunk there.
+    Chunking only bounds the raw text held at once: ``load`` concatenates
+    the converted chunks, so a provider's catalog must fit in memory.
+    """
+
+    def __init__(self, name, platform, columns, build, dtypes=None):
+        self.name = name
+        self.platform = platform
+        self.columns = columns
+        self.build = build
+        self.dtypes = dtypes or {}
+
+    def __call__(self, path):
+        return self.load(path)
+
+    def describe(self):
+        """Stable description of the mapping, for artifact keys"""
+        return f"{self.name}|{self.platform}|{self.build.__name__}|{sorted(self.columns.items())!r}"
+
+    def chunks(self, path, chunk_rows=None):
+        """Raw frames with only the mapped source columns"""
+        header = pd.read_csv(path, nrows=0).columns
+        wanted = {alias for aliases, _ in self.columns.values() for alias in aliases}
+        missing = [
+            aliases[0] for aliases, default in self.columns.values()
+            if default is REQUIRED and not any(alias in header for alias in aliases)
+        ]
+        if missing:
+            raise ValueError(f"{self.name} source {path} lacks columns: {', '.join(missing)}")
+        usecols = [column for column in header if column in wanted]
+        dtype = {column: kind for column, kind in self.dtypes.items() if column in usecols}
+        if chunk_rows is None and os.path.getsize(path) > INGEST_CHUNK_BYTES:
+            chunk_rows = INGEST_CHUNK_ROWS
+        if chunk_rows:
+            yield from pd.read_csv(path, usecols=usecols, dtype=dtype, chunksize=chunk_rows)
+        else:
+            yield pd.read_csv(path, usecols=usecols, dtype=dtype)
+
+    def convert(self, df):
+        """One raw frame as a catalog-schema frame"""
+        columns = {name: resolve_column(df, aliases, default) for name, (aliases, default) in self.columns.items()}
+        fields = self.build(columns)
+        fields["provider"] = self.name
+        fields["platform"] = self.platform
+        return catalog_frame(fields)
+
+    def load(self, path, chunk_rows=None):
+        """Parse ``path`` chunk by chunk into one catalog-schema frame"""
+        frames = [self.convert(chunk) for chunk in self.chunks(path, chunk_rows)]
+        if len(frames) == 1:
+            return frames[0]
+        return catalog_frame(pd.concat(frames, ignore_index=True) if frames else [])
+
+
+def udemy_fields(c):
+    subscribers = c["num_subscribers"]
+    return {
+        "title": c["title"],
+        "url": c["url"],
+        "is_paid": truthy(c["is_paid"]),
+        "price": c["price"],
+        "num_subscribers": subscribers,
+        "level": c["level"],
+        "duration": c["content_duration"].astype(str) + " hours",
+        "subject": c["subject"],
+        "num_lectures": c["num_lectures"],
+        "popularity_score": subscribers * (1 + c["num_reviews"] / 1000),
+        "rating": (c["num_reviews"] / subscribers.clip(lower=1) * 10 + 3.5).clip(1.0, 5.0),
+    }
+
+
+def coursera_fields(c):
+    # Prices are read as text; other text ("Free", "$49") is treated as paid
+    # with an unknown amount, a missing price as free
+    text = c["price"]
+    price = pd.to_numeric(text, errors="coerce")
+    is_text = price.isna() & text.notna()
+    is_paid = (price > 0) | is_text
+    price = price.mask(is_text, 0)
+
+    return {
+        "title": c["title"],
+        "url": c["url"],
+        "is_paid": is_paid,
+        "price": price,
+        "num_subscribers": c["num_subscribers"],
+        "level": c["level"],
+        "duration": hours_label(c["duration"]),
+        "subject": c["subject"],
+        "num_lectures": None,
+        "popularity_score": c["enrolled"] * 1.1,
+        # A missing rating falls to the 1.0 floor, as min/max over NaN did
+        "rating": c["rating"].clip(1.0, 5.0).fillna(1.0),
+    }
+
+
+def generic_fields(c):
+    """Catalog fields for any export mapped onto the ``GENERIC_COLUMNS`` names"""
+    price = pd.to_numeric(c["price"], errors="coerce")
+    subscribers = pd.to_numeric(c["num_subscribers"], errors="coerce").fillna(0)
+    return {
+        "title": c["title"],
+        "url": c["url"],
+        "is_paid": price.fillna(0) > 0,
+        "price": price.fillna(0),
+        "num_subscribers": subscribers,
+        "level": c["level"],
+        "duration": hours_label(c["duration"]),
+        "subject": c["subject"],
+        "num_lectures": pd.to_numeric(c["num_lectures"], errors="coerce"),
+        "popularity_score": subscribers,
+        "rating": pd.to_numeric(c["rating"], errors="coerce").clip(1.0, 5.0).fillna(4.2),
+    }
+
+
+UDEMY = ProviderAdapter(
+    "Udemy", "udemy",
+    columns={
+        "title": (("course_title",), REQUIRED),
+        "url": (("url",), REQUIRED),
+        "is_paid": (("is_paid",), REQUIRED),
+        "price": (("price",), REQUIRED),
+        "num_subscribers": (("num_subscribers",), REQUIRED),
+        "num_reviews": (("num_reviews",), REQUIRED),
+        "num_lectures": (("num_lectures",), REQUIRED),
+        "level": (("level",), REQUIRED),
+        "content_duration": (("content_duration",), REQUIRED),
+        "subject": (("subject",), REQUIRED),
+    },
+    build=udemy_fields,
+    dtypes={
+        "course_title": str,
+        "url": str,
+        "is_paid": str,
+        "price": "int64",
+        "num_subscribers": "int64",
+        "num_reviews": "int64",
+        "num_lectures": "int64",
+        "level": "category",
+        "content_duration": "float64",
+        "subject": "category",
+    },
+)
+
+# Alternative column names used by different Coursera exports, in priority order
+COURSERA = ProviderAdapter(
+    "Coursera", "coursera",
+    columns={
+        "title": (("course_name", "title", "name"), "Unknown Course"),
+        "url": (("course_url", "url"), ""),
+        "price": (("price", "course_price"), 0),
+        "level": (("level", "difficulty"), "All Levels"),
+        "subject": (("subject", "category"), "General"),
+        "duration": (("duration", "course_duration"), "Unknown"),
+        "num_subscribers": (("enrolled", "students"), 0),
+        "enrolled": (("enrolled",), 0),
+        "rating": (("rating",), 4.2),
+    },
+    build=coursera_fields,
+    # Explicit, so chunked reads can't infer a different type per chunk
+    dtypes={
+        "course_name": str,
+        "title": str,
+        "name": str,
+        "course_url": str,
+        "url": str,
+        "price": str,
+        "course_price": str,
+        "level": "category",
+        "difficulty": "category",
+        "subject": "category",
+        "category": "category",
+        "duration": str,
+        "course_duration": str,
+        "enrolled": "float64",
+        "students": "float64",
+        "rating": "float64",
+    },
+)
+
+# Defaults for adapters configured in CATALOG_SOURCES; "columns" there
+# overrides the aliases per field
+GENERIC_COLUMNS = {
+    "title": (("title", "course_title", "course_name", "name"), REQUIRED),
+    "url": (("url", "course_url", "link"), ""),
+    "price": (("price", "course_price"), 0),
+    "num_subscribers": (("num_subscribers", "enrolled", "students", "learners"), 0),
+    "level": (("level", "difficulty"), "All Levels"),
+    "duration": (("duration", "content_duration", "course_duration"), "Unknown"),
+    "subject": (("subject", "category"), "General"),
+    "num_lectures": (("num_lectures", "lectures"), None),
+    "rating": (("rating",), 4.2),
+}
+
+ADAPTERS = {"udemy": UDEMY, "coursera": COURSERA}
+
+load_udemy_courses = UDEMY.load
+load_coursera_courses = COURSERA.load
+
+
+def generic_adapter(name, platform=None, columns=None):
+    """Adapter for an export that only needs column renames"""
+    mapping = dict(GENERIC_COLUMNS)
+    for field, aliases in (columns or {}).items():
+        if field not in mapping:
+            raise ValueError(f"Unknown catalog field {field!r} in the column mapping for {name}")
+        mapping[field] = (tuple([aliases] if isinstance(aliases, str) else aliases), mapping[field][1])
+    return ProviderAdapter(name, platform or name.lower(), mapping, build=generic_fields)
+
+
+def configured_sources(path):
+    """Sources listed in a JSON file, as (name, adapter, path) tuples"""
+    with open(path) as f:
+        entries = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    sources = []
+    for entry in entries:
+        name = entry["name"]
+        kind = entry.get("adapter", "generic")
+        if kind == "generic":
+            adapter = generic_adapter(name, entry.get("platform"), entry.get("columns"))
+        elif kind in ADAPTERS:
+            adapter = ADAPTERS[kind]
+        else:
+            raise ValueError(f"Unknown adapter {kind!r} for source {name}")
+        sources.append((name, adapter, os.path.join(base, entry["path"])))
+    return sources
+
+
+# Course sources as (name, loader, path), in catalog order
+if os.getenv("CATALOG_SOURCES"):
+    SOURCES = configured_sources(os.getenv("CATALOG_SOURCES"))
+else:
+    SOURCES = [
+        ("Udemy", load_udemy_courses, UDEMY_PATH),
+        ("Coursera", load_coursera_courses, COURSERA_PATH),
+    ]
+
+
+def parse_source(source):
+    """Parse one (name, loader, path) source; returns (frame, seconds, error)"""
+    name, loader, path = source
+    start = time.perf_counter()
+    try:
+        frame, error = loader(path), None
+    except Exception as e:
+        frame, error = catalog_frame([]), str(e)
+    return frame, time.perf_counter() - start, error
+
+
+def pool_size(sources):
+    """Worker processes for parsing ``sources`` (1 means parse inline)"""
+    present = [path for _, _, path in sources if os.path.exists(path)]
+    if len(present) < 2 or sum(os.path.getsize(path) for path in present) < INGEST_PARALLEL_BYTES:
+        return 1
+    return min(len(present), INGEST_WORKERS or os.cpu_count() or 1)
+
+
+def title_keys(titles):
+    """Normalised titles: casefolded, punctuation dropped, whitespace collapsed"""
+    keys = titles.astype(str).str.casefold().str.replace(r"[^\w\s]+", " ", regex=True)
+    return keys.str.split().str.join(" ")
+
+
+def dedupe_providers(frame):
+    """Drop courses whose normalised title already appeared for an earlier provider.
+
+    Duplicates within one provider are kept; across providers the course
+    from the source listed first wins.
+    """
+    if frame.empty or frame["provider"].nunique() < 2:
+        return frame
+    keys = title_keys(frame["title"])
+    providers = frame["provider"].astype(str)
+    seen = set()
+    keep = pd.Series(True, index=frame.index)
+    for provider in providers.drop_duplicates():
+        rows = providers == provider
+        provider_keys = keys[rows]
+        keep[rows] = ~provider_keys.isin(seen)
+        seen.update(provider_keys)
+    dropped = int((~keep).sum())
+    if dropped:
+        log.info("duplicates_dropped", courses=dropped)
+    return frame[keep.to_numpy()].reset_index(drop=True)
+
+
+def load_catalog_frame(sources, timings, enrichment_path=ENRICHMENT_PATH):
+    """Parse every source into one catalog-schema frame with stored enrichments, recording timings"""
+    present = []
+    for source in sources:
+        if os.path.exists(source[2]):
+            present.append(source)
+        else:
+            log.warning("source_missing", source=source[0], path=source[2])
+
+    workers = pool_size(present)
+    if workers > 1:
+        # spawn: safe to start from the reload thread of a running server
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(workers, mp_context=context) as pool:
+            results = list(pool.map(parse_source, present))
+    else:
+        results = [parse_source(source) for source in present]
+
+    frames = []
+    for (name, _, path), (frame, seconds, error) in zip(present, results):
+        timings[f"load_{name.lower()}"] = seconds
+        record(f"load_{name.lower()}", seconds)
+        if error:
+            log.error("source_load_failed", source=name, path=path, error=error)
+        else:
+            log.info("source_loaded", source=name, courses=len(frame), seconds=seconds, workers=workers)
+        if len(frame):
+            frames.append(frame)
+
+    frame = catalog_frame(pd.concat(frames, ignore_index=True) if frames else [])
+    if INGEST_DEDUP:
+        frame = dedupe_providers(frame)
+    return apply_enrichment(frame, EnrichmentStore(enrichment_path))
@@ -0,0 +1,156 @@
+import asyncio
+import os
+import random
+import time
+
+from logs import get_logger
+from metrics import Counter, Histogram
+
+GEMINI_MODEL_NAME = "gemini-1.5-flash"  # Use flash model for better rate limits
+
+log = get_logger("llm")
+GEMINI_CALLS = Counter("upskill_gemini_calls_total", "Gemini calls by outcome", ["kind", "outcome"])
+GEMINI_SECONDS = Histogram("upskill_gemini_call_seconds", "Latency of successful Gemini calls")
+
+
+def configure_model():
+    """Gemini model from the environment, a fake model, or ``None``"""
+    api_key = os.getenv("GEMINI_API_KEY")
+    if api_key:
+        try:
+            import google.generativeai as genai
+
+            genai.configure(api_key=api_key)
+            model = genai.GenerativeModel(GEMINI_MODEL_NAME)
+            log.info("gemini_configured", model=GEMINI_MODEL_NAME)
+            return model
+        except Exception as e:
+            log.error("gemini_configuration_failed", error=str(e))
+            return None
+    if os.getenv("GEMINI_FAKE_LATENCY"):
+        from enrichment import stub_enrichment
+
+        # Local stand-in for development and load tests, answering with
+        # enrichments that parse like real ones
+        log.warning("gemini_fake_model", latency=float(os.getenv("GEMINI_FAKE_LATENCY")))
+        return FakeModel(latency=float(os.getenv("GEMINI_FAKE_LATENCY")), text=stub_enrichment)
+    log.warning("gemini_disabled", reason="GEMINI_API_KEY not set")
+    return None
+
+
+class LLMClient:
+    """Async wrapper around a Gemini ``GenerativeModel``.
+
+    Calls go through a bounded semaphore, each one has its own timeout, and
+    concurrent calls with an identical prompt share a single upstream
+    request. Models without ``generate_content_async`` are run in the
+    default executor so they never block the event loop. With a ``cache``,
+    responses are stored by ``cache_key`` and repeat calls skip the model;
+    its SQLite tier is read and written off the event loop.
+    """
+
+    def __init__(self, model, max_concurrency=4, timeout=10.0, cache=None, model_name=GEMINI_MODEL_NAME):
+        self.model = model
+        self.model_name = model_name
+        self.cache = cache
+        self.calls = 0
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self._loop = None
+        self._semaphore = None
+        self._inflight = {}
+
+    def _bind(self):
+        # Semaphores and tasks belong to one event loop; rebind if it changed
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._inflight = {}
+
+    async def _call(self, prompt, timeout, kind):
+        async with self._semaphore:
+            if hasattr(self.model, "generate_content_async"):
+                call = self.model.generate_content_async(prompt)
+            else:
+                loop = asyncio.get_running_loop()
+                call = loop.run_in_executor(None, self.model.generate_content, prompt)
+            self.calls += 1
+            start = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(call, timeout)
+            except asyncio.TimeoutError:
+                GEMINI_CALLS.inc(kind=kind, outcome="timeout")
+                raise
+            except Exception:
+                GEMINI_CALLS.inc(kind=kind, outcome="error")
+                raise
+            GEMINI_CALLS.inc(kind=kind, outcome="ok")
+            GEMINI_SECONDS.observe(time.perf_counter() - start)
+            return response.text
+
+    def _forget(self, prompt, task):
+        if self._inflight.get(prompt) is task:
+            del self._inflight[prompt]
+
+    async def _cached_call(self, prompt, timeout, cache_key, kind):
+        text = await self._call(prompt, timeout, kind)
+        if self.cache is not None and cache_key:
+            await self.cache.set_async(cache_key, text)
+        return text
+
+    async def generate(self, prompt, timeout=None, cache_key=None, kind="other", refresh=False):
+        """Response text for ``prompt``; raises ``asyncio.TimeoutError`` past the deadline.
+
+        ``refresh`` skips the cache lookup (the new response still replaces
+        the cached one), e.g. to retry a response that didn't parse.
+        """
+        if self.cache is not None and cache_key and not refresh:
+            cached = await self.cache.get_async(cache_key)
+            if cached is not None:
+                GEMINI_CALLS.inc(kind=kind, outcome="cached")
+                return cached
+
+        self._bind()
+        task = self._inflight.get(prompt)
+        if task is None:
+            task = asyncio.ensure_future(self._cached_call(prompt, timeout or self.timeout, cache_key, kind))
+            self._inflight[prompt] = task
+            task.add_done_callback(lambda done: self._forget(prompt, done))
+        # Shield so one caller giving up doesn't cancel the shared call
+        return await asyncio.shield(task)
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    """Local stand-in for a Gemini model with configurable latency.
+
+    ``text`` is the response, or a function of the prompt returning it.
+    ``error_rate`` of the calls fail like a rate-limited Gemini request.
+    """
+
+    def __init__(self, latency=0.0, text="{}", error_rate=0.0, seed=0):
+        self.latency = latency
+        self.text = text
+        self.error_rate = error_rate
+        self.calls = 0
+        self._random = random.Random(seed)
+
+    def _respond(self, prompt):
+        if self.error_rate and self._random.random() < self.error_rate:
+            raise RuntimeError("429 Resource has been exhausted (fake model)")
+        return FakeResponse(self.text(prompt) if callable(self.text) else self.text)
+
+    def generate_content(self, prompt):
+        self.calls += 1
+        time.sleep(self.latency)
+        return self._respond(prompt)
+
+    async def generate_content_async(self, prompt):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return self._respond(prompt)
@@ -0,0 +1,155 @@
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(os.path.dirname(__file__), "data", "llm_cache.sqlite"))
+
+
+def cache_key(model_name, kind, **inputs):
+    """Content address for a model call: model + call kind + normalised inputs"""
+    payload = json.dumps({"model": model_name, "kind": kind, "inputs": inputs}, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Two-tier cache for model responses.
+
+    An in-process LRU sits in front of a SQLite table shared by every worker
+    on the host. Entries expire after ``ttl`` seconds and the table is
+    trimmed to ``max_entries`` least recently used rows. ``get_async`` and
+    ``set_async`` serve the LRU inline and run the SQLite I/O in a worker
+    thread, so a slow disk never stalls the event loop.
+    """
+
+    def __init__(self, path=LLM_CACHE_PATH, ttl=30 * 86400, max_memory=1024, max_entries=100_000):
+        self.path = path
+        self.ttl = ttl
+        self.max_memory = max_memory
+        self.max_entries = max_entries
+        self.memory = OrderedDict()
+        self.hits_memory = 0
+        self.hits_disk = 0
+        self.misses = 0
+        self._writes = 0
+        # Memory tier and counters; SQLite has its own lock so the event
+        # loop never waits on disk I/O running in a worker thread
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._conn = None
+        self._pid = None
+
+    @property
+    def _db(self):
+        # SQLite connections must not cross a fork (gunicorn preload), so each
+        # process opens its own on first use
+        if self._conn is None or self._pid != os.getpid():
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+            self._pid = os.getpid()
+        return self._conn
+
+    def _remember(self, key, value, created):
+        self.memory[key] = (value, created)
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.max_memory:
+            self.memory.popitem(last=False)
+
+    def _get_memory(self, key, now):
+        with self._lock:
+            entry = self.memory.get(key)
+            if entry is not None and now - entry[1] < self.ttl:
+                self.memory.move_to_end(key)
+                self.hits_memory += 1
+                return entry[0]
+        return None
+
+    def _get_disk(self, key, now):
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT value, created FROM responses WHERE key = ? AND created > ?", (key, now - self.ttl)
+            ).fetchone()
+            if row is not None:
+                self._db.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+        with self._lock:
+            if row is None:
+                self.memory.pop(key, None)
+                self.misses += 1
+                return None
+            self._remember(key, row[0], row[1])
+            self.hits_disk += 1
+            return row[0]
+
+    def get(self, key):
+        """Cached value for ``key``, or ``None``"""
+        now = time.time()
+        value = self._get_memory(key, now)
+        return value if value is not None else self._get_disk(key, now)
+
+    async def get_async(self, key):
+        """``get`` with the SQLite lookup in a worker thread"""
+        now = time.time()
+        value = self._get_memory(key, now)
+        if value is None:
+            value = await asyncio.to_thread(self._get_disk, key, now)
+        return value
+
+    def _write(self, key, value, now):
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._writes += 1
+            due = self._writes % 1000 == 0
+        if due:
+            self.evict()
+
+    def set(self, key, value):
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+        self._write(key, value, now)
+
+    async def set_async(self, key, value):
+        """``set`` with the SQLite write (and any eviction) in a worker thread"""
+        now = time.time()
+        with self._lock:
+            self._remember(key, value, now)
+        await asyncio.to_thread(self._write, key, value, now)
+
+    def evict(self):
+        """Drop expired rows and trim the table to ``max_entries``"""
+        now = time.time()
+        with self._db_lock:
+            self._db.execute("DELETE FROM responses WHERE created <= ?", (now - self.ttl,))
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN ("
+                "SELECT key FROM responses ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def stats(self):
+        with self._db_lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        with self._lock:
+            lookups = self.hits_memory + self.hits_disk + self.misses
+            return {
+                "hits_memory": self.hits_memory,
+                "hits_disk": self.hits_disk,
+                "misses": self.misses,
+                "hit_ratio": (self.hits_memory + self.hits_disk) / lookups if lookups else 0.0,
+                "memory_entries": len(self.memory),
+                "disk_entries": entries,
+            }
@@ -0,0 +1,75 @@
+"""Structured logging.
+
+Modules log an event name plus key/value fields::
+
+    log = get_logger(__name__)
+    log.info("index_loaded", key=key, courses=len(catalog), seconds=0.012)
+
+``LOG_FORMAT=json`` writes one JSON object per line; the default is
+``event key=value`` text. ``LOG_LEVEL`` sets the level (default INFO).
+"""
+import json
+import logging
+import os
+import sys
+import time
+
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+
+
+class StructuredLogger(logging.LoggerAdapter):
+    """Logger taking fields as keyword arguments"""
+
+    def process(self, msg, kwargs):
+        fields = {key: kwargs.pop(key) for key in list(kwargs) if key not in ("exc_info", "stack_info", "stacklevel")}
+        kwargs["extra"] = {"fields": fields}
+        return msg, kwargs
+
+
+def _value(value):
+    if isinstance(value, float):
+        return round(value, 6)
+    if isinstance(value, (str, int, bool)) or value is None:
+        return value
+    return str(value)
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+        }
+        entry.update((key, _value(value)) for key, value in getattr(record, "fields", {}).items())
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        stamp = time.strftime("%H:%M:%S", time.localtime(record.created))
+        fields = " ".join(f"{key}={_value(value)}" for key, value in getattr(record, "fields", {}).items())
+        line = f"{stamp} {record.levelname:<7} {record.name}: {record.getMessage()} {fields}".rstrip()
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+def configure_logging(fmt=LOG_FORMAT, level=LOG_LEVEL):
+    """Send ``upskill.*`` logs to stderr (once per process)"""
+    logger = logging.getLogger("upskill")
+    if logger.handlers:
+        return
+    handler = logging.StreamHandler(sys.stderr)
+    handler.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+
+
+def get_logger(name):
+    return StructuredLogger(logging.getLogger(f"upskill.{name}"), {})
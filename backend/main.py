@@ -1,14 +1,60 @@
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, Header, HTTPException, Query, Request, Response
 from typing import List, Optional
-import pandas as pd
+import asyncio
+import importlib
+from contextlib import asynccontextmanager
+import numpy as np
 import os
 import re
-import google.generativeai as genai
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+import secrets
+import time
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
+from index_manifest import latest_manifest
+from llm import LLMClient, configure_model
+from llm_cache import ResponseCache
+from logs import configure_logging, get_logger
+from metrics import Counter, Gauge, Histogram, record, render, request_timings, server_timing, span
+from profiler import SamplingProfiler
+from retrieval import rank
+from career_graph import MAX_PATH_STEPS
+from fastjson import dumps, encode
+from query_cache import QueryCache, decode_cursor, encode_cursor, make_etag, parse_skills
+from taxonomy import (
+    COMMON_SKILLS,
+    JOB_ROLE_MAPPING,
+    ROLES_BY_NAME,
+    get_relevant_subjects_and_skills,
+    match_career_track,
+    normalize_role,
+)
+
+configure_logging()
+log = get_logger("app")
+
+@asynccontextmanager
+async def lifespan(app):
+    if LAZY_STARTUP:
+        # Serve straight away; the index loads in a worker thread
+        app.state.startup_task = asyncio.create_task(run_in_threadpool(load_index, watch=True))
+    else:
+        watch_index(index_manager)
+    yield
+
+app = FastAPI(lifespan=lifespan)
+
+class FastJSONResponse(Response):
+    """JSON response from a dict (which may hold ``RawJSON``) or encoded bytes.
+
+    Returned directly by the hot endpoints, which skips FastAPI's
+    ``jsonable_encoder`` pass over the result.
+    """
+    media_type = "application/json"
 
-app = FastAPI()
+    def render(self, content):
+        return content if isinstance(content, bytes) else encode(content)
 
 app.add_middleware(
     CORSMiddleware,
@@ -27,510 +73,599 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize Gemini API (you'll need to set your API key)
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-if GEMINI_API_KEY:
-    try:
-        genai.configure(api_key=GEMINI_API_KEY)
-        gemini_model = genai.GenerativeModel('gemini-1.5-flash')  # Use flash model for better rate limits
-        print("✅ Gemini AI is configured and ready!")
-    except Exception as e:
-        print(f"❌ Gemini API configuration failed: {e}")
-        gemini_model = None
-else:
-    print("⚠️  GEMINI_API_KEY not set. AI features will be disabled.")
-    gemini_model = None
-
-# Load both Udemy and Coursera courses
-UDEMY_PATH = os.path.join(os.path.dirname(__file__), "data/udemy_courses.csv")
-COURSERA_PATH = os.path.join(os.path.dirname(__file__), "data/Coursera.csv")
-
-# Enhanced job role to subject mapping with skills
-JOB_ROLE_MAPPING = {
-    "Software Engineer": {
-        "subjects": ["Web Development", "Programming Languages", "Software Engineering"],
-        "skills": ["Python", "JavaScript", "Java", "React", "Node.js", "SQL", "Git", "Docker"],
-        "next_roles": ["Senior Software Engineer", "Full Stack Developer", "Backend Engineer", "DevOps Engineer"]
-    },
-    "Data Scientist": {
-        "subjects": ["Data Science", "Machine Learning", "Business Analytics"],
-        "skills": ["Python", "R", "SQL", "Machine Learning", "Statistics", "Pandas", "Scikit-learn", "TensorFlow"],
-        "next_roles": ["Senior Data Scientist", "ML Engineer", "Data Engineer", "AI Engineer"]
-    },
-    "Product Manager": {
-        "subjects": ["Business", "Product Management", "Marketing"],
-        "skills": ["Product Strategy", "User Research", "Agile", "SQL", "Analytics", "Leadership", "Communication"],
-        "next_roles": ["Senior Product Manager", "Product Director", "VP Product", "Entrepreneur"]
-    },
-    "Digital Marketer": {
-        "subjects": ["Marketing", "Business", "Digital Marketing"],
-        "skills": ["SEO", "Google Ads", "Social Media", "Analytics", "Content Marketing", "Email Marketing"],
-        "next_roles": ["Marketing Manager", "Digital Marketing Director", "Growth Hacker", "Marketing Consultant"]
-    },
-    "Graphic Designer": {
-        "subjects": ["Design", "Graphic Design", "Web Design"],
-        "skills": ["Photoshop", "Illustrator", "InDesign", "UI/UX", "Typography", "Color Theory"],
-        "next_roles": ["Senior Designer", "Art Director", "UX Designer", "Creative Director"]
-    },
-    "Business Analyst": {
-        "subjects": ["Business", "Business Analytics", "Data Science"],
-        "skills": ["SQL", "Excel", "Tableau", "Power BI", "Business Intelligence", "Requirements Analysis"],
-        "next_roles": ["Senior Business Analyst", "Data Analyst", "Product Manager", "Business Intelligence Manager"]
-    },
-    "DevOps Engineer": {
-        "subjects": ["IT & Software", "Software Engineering", "Web Development"],
-        "skills": ["Docker", "Kubernetes", "AWS", "CI/CD", "Linux", "Python", "Shell Scripting"],
-        "next_roles": ["Senior DevOps Engineer", "Site Reliability Engineer", "Cloud Architect", "DevOps Manager"]
-    },
-    "UX Designer": {
-        "subjects": ["Design", "Web Design", "User Experience"],
-        "skills": ["Figma", "Sketch", "User Research", "Prototyping", "Information Architecture", "Usability Testing"],
-        "next_roles": ["Senior UX Designer", "UX Manager", "Product Designer", "UX Director"]
-    },
-    "Data Analyst": {
-        "subjects": ["Data Science", "Business Analytics", "Business"],
-        "skills": ["SQL", "Excel", "Python", "Tableau", "Power BI", "Statistics", "Data Visualization"],
-        "next_roles": ["Senior Data Analyst", "Business Intelligence Analyst", "Data Scientist", "Analytics Manager"]
-    },
-    "Project Manager": {
-        "subjects": ["Business", "Project Management", "Leadership"],
-        "skills": ["Agile", "Scrum", "JIRA", "Risk Management", "Leadership", "Communication", "Budgeting"],
-        "next_roles": ["Senior Project Manager", "Program Manager", "Project Director", "Portfolio Manager"]
-    },
-    "Frontend Developer": {
-        "subjects": ["Web Development", "Programming Languages", "Design"],
-        "skills": ["HTML", "CSS", "JavaScript", "React", "Vue.js", "Angular", "Responsive Design"],
-        "next_roles": ["Senior Frontend Developer", "Full Stack Developer", "Frontend Architect", "UI Developer"]
-    },
-    "Backend Developer": {
-        "subjects": ["Web Development", "Programming Languages", "Software Engineering"],
-        "skills": ["Python", "Java", "Node.js", "SQL", "APIs", "Database Design", "Server Management"],
-        "next_roles": ["Senior Backend Developer", "Full Stack Developer", "Backend Architect", "API Developer"]
-    },
-    "Full Stack Developer": {
-        "subjects": ["Web Development", "Programming Languages", "Software Engineering"],
-        "skills": ["HTML", "CSS", "JavaScript", "Python", "Node.js", "SQL", "React", "APIs"],
-        "next_roles": ["Senior Full Stack Developer", "Tech Lead", "Software Architect", "Engineering Manager"]
-    },
-    "Mobile Developer": {
-        "subjects": ["Mobile Development", "Programming Languages", "Software Engineering"],
-        "skills": ["Swift", "Kotlin", "React Native", "Flutter", "Mobile UI", "App Store", "Firebase"],
-        "next_roles": ["Senior Mobile Developer", "Mobile Architect", "iOS/Android Lead", "Mobile Engineering Manager"]
-    },
-    "AI Engineer": {
-        "subjects": ["Machine Learning", "Data Science", "Programming Languages"],
-        "skills": ["Python", "TensorFlow", "PyTorch", "Machine Learning", "Deep Learning", "NLP", "Computer Vision"],
-        "next_roles": ["Senior AI Engineer", "ML Engineer", "AI Research Scientist", "AI Product Manager"]
-    },
-    "Cybersecurity Analyst": {
-        "subjects": ["IT & Software", "Network & Security", "Software Engineering"],
-        "skills": ["Network Security", "Penetration Testing", "SIEM", "Incident Response", "Compliance", "Cryptography"],
-        "next_roles": ["Senior Security Analyst", "Security Engineer", "Security Manager", "CISO"]
-    },
-    "Cloud Engineer": {
-        "subjects": ["IT & Software", "Software Engineering", "Web Development"],
-        "skills": ["AWS", "Azure", "GCP", "Docker", "Kubernetes", "Terraform", "Linux", "Networking"],
-        "next_roles": ["Senior Cloud Engineer", "Cloud Architect", "DevOps Engineer", "Cloud Manager"]
-    },
-    "QA Engineer": {
-        "subjects": ["Software Engineering", "IT & Software", "Web Development"],
-        "skills": ["Manual Testing", "Automated Testing", "Selenium", "JIRA", "Test Planning", "API Testing"],
-        "next_roles": ["Senior QA Engineer", "Test Lead", "QA Manager", "Test Automation Engineer"]
-    }
-}
-
-# Common skills for skill extraction
-COMMON_SKILLS = [
-    "Python", "JavaScript", "Java", "React", "Node.js", "SQL", "Git", "Docker", "AWS", "Machine Learning",
-    "Data Science", "HTML", "CSS", "Angular", "Vue.js", "PHP", "C++", "C#", "Ruby", "Go", "Rust",
-    "Swift", "Kotlin", "Flutter", "React Native", "TensorFlow", "PyTorch", "Pandas", "NumPy", "Scikit-learn",
-    "Tableau", "Power BI", "Excel", "Agile", "Scrum", "JIRA", "Figma", "Sketch", "Photoshop", "Illustrator",
-    "SEO", "Google Ads", "Social Media", "Content Marketing", "Email Marketing", "Analytics", "Leadership"
-]
-
-def enhance_course_with_gemini(course):
-    """Enhance course data using Gemini AI"""
-    if not gemini_model:
-        return course
-    
-    try:
-        prompt = f"""
-        Analyze this course and provide enhanced information:
-        Title: {course['title']}
-        Subject: {course['subject']}
-        Level: {course['level']}
-        Duration: {course['duration']}
-        
-        Please provide:
-        1. A detailed description (2-3 sentences)
-        2. Key skills taught (comma-separated)
-        3. Difficulty level (Beginner/Intermediate/Advanced)
-        4. Target audience
-        5. Learning outcomes (3-4 points)
-        
-        Format as JSON:
-        {{
-            "description": "...",
-            "skills": ["skill1", "skill2"],
-            "difficulty": "...",
-            "target_audience": "...",
-            "learning_outcomes": ["outcome1", "outcome2", "outcome3"]
-        }}
-        """
-        
-        response = gemini_model.generate_content(prompt)
-        # Parse the response and enhance the course
-        # For now, we'll just add a note that Gemini is available
-        course['ai_enhanced'] = True
-        return course
-    except Exception as e:
-        print(f"Gemini API error: {e}")
-        return course
+# Computed /recommendations and /career_path responses, and how long
+# browsers/CDNs may reuse them
+recommendation_cache = QueryCache(int(os.getenv("RESULT_CACHE_SIZE", "2048")))
+career_path_cache = QueryCache(int(os.getenv("RESULT_CACHE_SIZE", "2048")))
+RESPONSE_MAX_AGE = int(os.getenv("RESPONSE_MAX_AGE", "300"))
 
-def fetch_courses_with_gemini(job_role, skills=None):
-    """Fetch courses using Gemini API"""
-    if not gemini_model:
-        return []
-    
-    try:
-        prompt = f"""
-        Find 5 relevant online courses for someone who wants to become a {job_role}.
-        Skills they have: {skills or 'None specified'}
-        
-        Please provide courses from platforms like Coursera, edX, Udemy, etc.
-        For each course, provide:
-        - Course title
-        - Platform (Coursera, edX, Udemy, etc.)
-        - URL (if available)
-        - Price (Free/Paid)
-        - Duration
-        - Level (Beginner/Intermediate/Advanced)
-        - Key skills covered
-        
-        Format as a list of courses with these details.
-        """
-        
-        response = gemini_model.generate_content(prompt)
-        # Parse the response and convert to course format
-        # This is a simplified version - you'd need to parse the response properly
-        return []
-    except Exception as e:
-        print(f"Gemini API error: {e}")
-        return []
+# /recommendations pages: largest page, and how many rows are ranked up
+# front so "load more" is served from the cached ranking
+MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "100"))
+RANKING_DEPTH = 64
 
-def load_udemy_courses():
-    """Load and process Udemy courses"""
+# Limits for POST /recommendations/batch
+MAX_BATCH_QUERIES = int(os.getenv("MAX_BATCH_QUERIES", "1000"))
+
+# Admin endpoints are disabled unless a token is configured
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+# Send per-stage timings to clients in a Server-Timing header
+SERVER_TIMING = os.getenv("SERVER_TIMING", "").lower() in ("1", "true", "yes")
+# Seconds between checks of the course CSVs for changes (0 disables watching)
+CATALOG_WATCH_INTERVAL = float(os.getenv("CATALOG_WATCH_INTERVAL", "0"))
+# Seconds between checks for an index another worker published, e.g. after
+# POST /admin/reload reached a different gunicorn worker (0 disables)
+INDEX_FOLLOW_INTERVAL = float(os.getenv("INDEX_FOLLOW_INTERVAL", "5"))
+
+# LAZY_STARTUP=1 binds before anything heavy is imported: the index (and
+# Gemini) load in the background, /ready reports when they are done, and
+# /, /skills, /platforms and /job_roles answer from the last artifact's
+# manifest meanwhile. The default loads everything at import, which is
+# what gunicorn's preload_app shares between workers.
+LAZY_STARTUP = os.getenv("LAZY_STARTUP", "").lower() in ("1", "true", "yes")
+# Imported (and timed) by load_index, in this order; each time excludes
+# the modules imported before it
+HEAVY_MODULES = (
+    "pandas", "scipy.sparse", "sklearn.feature_extraction.text", "joblib",
+    "artifact", "index_manager", "enrichment",
+)
+
+# All Gemini calls go through one async client: bounded concurrency,
+# per-call timeouts and coalescing of identical in-flight prompts
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "4"))
+GEMINI_TIMEOUT = float(os.getenv("GEMINI_TIMEOUT", "10"))
+# Overall budget for AI enrichment within one /recommendations request
+GEMINI_REQUEST_DEADLINE = float(os.getenv("GEMINI_REQUEST_DEADLINE", "15"))
+# Responses are cached in-process and in SQLite, keyed on model + inputs
+llm_cache = ResponseCache(ttl=float(os.getenv("LLM_CACHE_TTL", str(30 * 86400))))
+gemini_model = None
+llm_client = None
+# Bulk enrichment started with POST /admin/enrich uses its own, smaller
+# concurrency budget so user requests keep theirs
+ENRICH_CONCURRENCY = int(os.getenv("ENRICH_CONCURRENCY", "2"))
+enrichment_task = None
+
+# Handlers read the live index once per request via current_index();
+# reloads swap in a whole new generation. None until load_index is done.
+index_manager = None
+startup_timings = {}
+startup_error = None
+
+def load_index(watch=False):
+    """Import the heavy modules, configure Gemini and load the index.
+
+    The prebuilt artifact is loaded, and rebuilt only if the CSVs changed.
+    """
+    global gemini_model, llm_client, index_manager, startup_error
     try:
-        df = pd.read_csv(UDEMY_PATH)
-        courses = []
-        for _, row in df.iterrows():
-            course = {
-                "title": row["course_title"],
-                "provider": "Udemy",
-                "url": row["url"],
-                "is_paid": bool(row["is_paid"] == True or row["is_paid"] == "True"),
-                "price": row["price"],
-                "num_subscribers": row["num_subscribers"],
-                "level": row["level"],
-                "duration": f"{row['content_duration']} hours",
-                "subject": row["subject"],
-                "description": f"{row['level']} course in {row['subject']} with {row['num_lectures']} lectures. {row['num_subscribers']} students enrolled.",
-                "popularity_score": row["num_subscribers"] * (1 + row["num_reviews"] / 1000),
-                "platform": "udemy",
-                "rating": min(5.0, max(1.0, row.get("num_reviews", 0) / max(row["num_subscribers"], 1) * 10 + 3.5))
-            }
-            courses.append(course)
-        return courses
+        for name in HEAVY_MODULES:
+            start = time.perf_counter()
+            importlib.import_module(name)
+            seconds = startup_timings[f"import_{name}"] = time.perf_counter() - start
+            record(f"import_{name}", seconds)
+        from artifact import load_or_build
+        from index_manager import IndexManager
+
+        # Initialize Gemini API (you'll need to set your API key)
+        start = time.perf_counter()
+        gemini_model = configure_model()
+        seconds = startup_timings["configure_gemini"] = time.perf_counter() - start
+        record("configure_gemini", seconds)
+        if gemini_model:
+            llm_client = LLMClient(gemini_model, GEMINI_MAX_CONCURRENCY, GEMINI_TIMEOUT, cache=llm_cache)
+        manager = IndexManager(load_or_build())
     except Exception as e:
-        print(f"Error loading Udemy courses: {e}")
-        return []
+        startup_error = str(e) or type(e).__name__
+        log.error("startup_failed", error=startup_error)
+        raise
+    startup_timings.update(manager.current.timings)
+    # Assigned last: handlers treat a set index_manager as "ready"
+    index_manager = manager
+    log.info("startup", courses=len(manager.current.catalog), **{f"{stage}_s": s for stage, s in startup_timings.items()})
+    if watch:
+        watch_index(manager)
+
+def watch_index(manager):
+    """Follow indexes published by other workers and, optionally, the CSVs"""
+    interval = CATALOG_WATCH_INTERVAL or INDEX_FOLLOW_INTERVAL
+    if interval:
+        manager.watch(interval, sources=bool(CATALOG_WATCH_INTERVAL))
 
-def load_coursera_courses():
-    """Load and process Coursera courses"""
+def current_index():
+    """The live index, or a 503 while it is still loading"""
+    if index_manager is None:
+        raise HTTPException(status_code=503, detail="Index is loading", headers={"Retry-After": "5"})
+    return index_manager.current
+
+# The last artifact's course count, job roles and platforms, for the
+# lightweight endpoints while a lazy startup is still loading the index
+# (keyed like the IndexBundle attributes they stand in for)
+startup_manifest = (latest_manifest() if LAZY_STARTUP else None) or {}
+startup_bodies = {}
+if "job_roles" in startup_manifest:
+    startup_bodies["job_roles_json"] = dumps(startup_manifest["job_roles"])
+    startup_bodies["platforms_json"] = dumps({"platforms": startup_manifest["platforms"]})
+
+if not LAZY_STARTUP:
+    load_index()
+SKILLS_JSON = dumps({"skills": COMMON_SKILLS})
+
+REQUEST_SECONDS = Histogram("upskill_request_seconds", "Request latency by route", ["method", "route"])
+REQUESTS = Counter("upskill_requests_total", "Requests by route and status", ["method", "route", "status"])
+Gauge("upskill_catalog_courses", "Courses in the live index", lambda: len(index_manager.current.catalog))
+Gauge("upskill_index_generation", "Live index generation", lambda: index_manager.current.generation)
+
+def cache_stats():
+    caches = {"recommendations": recommendation_cache.stats(), "career_path": career_path_cache.stats()}
+    lookups = llm_cache.hits_memory + llm_cache.hits_disk + llm_cache.misses
+    caches["gemini"] = {"hit_ratio": (llm_cache.hits_memory + llm_cache.hits_disk) / lookups if lookups else 0.0}
+    return caches
+
+Gauge(
+    "upskill_cache_hit_ratio", "Hit ratio per cache",
+    lambda: {(name,): stats["hit_ratio"] for name, stats in cache_stats().items()}, ["cache"],
+)
+Gauge(
+    "upskill_gemini_model_calls", "Gemini requests sent upstream (excludes cache hits)",
+    lambda: llm_client.calls if llm_client else 0,
+)
+
+def profiling_requested(request):
+    """Admins can profile a single request with an ``X-Profile: 1`` header"""
+    if not ADMIN_TOKEN or request.headers.get("x-profile") not in ("1", "true"):
+        return False
+    return secrets.compare_digest(request.headers.get("x-admin-token", ""), ADMIN_TOKEN)
+
+@app.middleware("http")
+async def instrument(request: Request, call_next):
+    """Request metrics, per-stage timings and the per-request profiler"""
+    timings = []
+    token = request_timings.set(timings)
+    start = time.perf_counter()
     try:
-        df = pd.read_csv(COURSERA_PATH)
-        courses = []
-        
-        for _, row in df.iterrows():
-            title = row.get("course_name", row.get("title", row.get("name", "Unknown Course")))
-            url = row.get("course_url", row.get("url", ""))
-            price = row.get("price", row.get("course_price", 0))
-            level = row.get("level", row.get("difficulty", "All Levels"))
-            subject = row.get("subject", row.get("category", "General"))
-            duration = row.get("duration", row.get("course_duration", "Unknown"))
-            
-            if isinstance(duration, str) and "hour" not in duration.lower():
-                duration = f"{duration} hours"
-            elif not isinstance(duration, str):
-                duration = f"{duration} hours"
-            
-            course = {
-                "title": title,
-                "provider": "Coursera",
-                "url": url,
-                "is_paid": price > 0 if isinstance(price, (int, float)) else True,
-                "price": price if isinstance(price, (int, float)) else 0,
-                "num_subscribers": row.get("enrolled", row.get("students", 0)),
-                "level": level,
-                "duration": duration,
-                "subject": subject,
-                "description": f"{level} course in {subject} on Coursera. {duration} duration.",
-                "popularity_score": row.get("enrolled", 0) * 1.1,
-                "platform": "coursera",
-                "rating": min(5.0, max(1.0, row.get("rating", 4.2)))
-            }
-            courses.append(course)
-        return courses
-    except Exception as e:
-        print(f"Error loading Coursera courses: {e}")
-        return []
-
-# Load all courses
-print("Loading Udemy courses...")
-udemy_courses = load_udemy_courses()
-print(f"Loaded {len(udemy_courses)} Udemy courses")
-
-print("Loading Coursera courses...")
-coursera_courses = load_coursera_courses()
-print(f"Loaded {len(coursera_courses)} Coursera courses")
-
-# Combine all courses
-courses = udemy_courses + coursera_courses
-print(f"Total courses loaded: {len(courses)}")
-
-# Extract unique job roles from subject and level
-job_roles = sorted(list(set([c["subject"] for c in courses] + [c["level"] for c in courses])))
-
-# Prepare course corpus for ML (title + subject + level + description)
-def course_corpus(courses):
-    return [f"{c['title']} {c['subject']} {c['level']} {c['description']}" for c in courses]
-
-corpus = course_corpus(courses)
-vectorizer = TfidfVectorizer(max_features=1000, stop_words='english')
-X = vectorizer.fit_transform(corpus)
-
-def extract_skills_from_text(text):
-    """Extract skills from text using common skills list"""
-    text_lower = text.lower()
-    found_skills = []
-    for skill in COMMON_SKILLS:
-        if skill.lower() in text_lower:
-            found_skills.append(skill)
-    return found_skills
-
-def get_relevant_subjects_and_skills(job_role, user_skills=None):
-    """Get relevant subjects and skills for a job role"""
-    if job_role in JOB_ROLE_MAPPING:
-        role_data = JOB_ROLE_MAPPING[job_role]
-        return role_data["subjects"], role_data["skills"]
-    
-    job_role_lower = job_role.lower()
-    relevant_subjects = []
-    relevant_skills = []
+        if profiling_requested(request):
+            with SamplingProfiler() as profiler:
+                await call_next(request)
+            # Folded stacks (flamegraph.pl / speedscope) instead of the response
+            return PlainTextResponse(profiler.folded(), headers={"X-Profile-Samples": str(profiler.samples)})
+        response = await call_next(request)
+    finally:
+        request_timings.reset(token)
+    elapsed = time.perf_counter() - start
     
-    for role, data in JOB_ROLE_MAPPING.items():
-        if any(word in job_role_lower for word in role.lower().split()):
-            relevant_subjects.extend(data["subjects"])
-            relevant_skills.extend(data["skills"])
-    
-    if not relevant_subjects:
-        relevant_subjects = ["Web Development", "Programming Languages", "Business", "Data Science"]
-    if not relevant_skills:
-        relevant_skills = ["Python", "JavaScript", "SQL", "Leadership"]
-    
-    return list(set(relevant_subjects)), list(set(relevant_skills))
+    route = request.scope.get("route")
+    route = route.path if route is not None else "unmatched"
+    REQUEST_SECONDS.observe(elapsed, method=request.method, route=route)
+    REQUESTS.inc(method=request.method, route=route, status=response.status_code)
+    if SERVER_TIMING:
+        response.headers["Server-Timing"] = server_timing(timings + [("total", elapsed)])
+    if elapsed > 1.0:
+        log.warning("slow_request", route=route, seconds=elapsed, stages=server_timing(timings))
+    return response
 
-def calculate_skill_match(course, user_skills):
-    """Calculate how well a course matches user skills"""
-    if not user_skills:
-        return 0
-    
-    course_text = f"{course['title']} {course['description']}".lower()
-    user_skills_lower = [skill.lower() for skill in user_skills]
-    
-    matches = sum(1 for skill in user_skills_lower if skill in course_text)
-    return matches / len(user_skills) if user_skills else 0
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus metrics for this worker process"""
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/")
 def read_root():
+    if index_manager is not None:
+        total_courses = len(index_manager.current.catalog)
+    else:
+        total_courses = startup_manifest.get("courses", 0)
     return {
         "message": "Upskill Recommender API is running!", 
-        "total_courses": len(courses),
+        "total_courses": total_courses,
         "gemini_available": gemini_model is not None
     }
 
+@app.get("/ready")
+def get_ready():
+    """Readiness probe: 200 once the index is loaded, 503 until then"""
+    if index_manager is None:
+        status = {"ready": False, "error": startup_error}
+        return FastJSONResponse(status, status_code=503, headers={"Retry-After": "5"})
+    index = current_index()
+    return FastJSONResponse({
+        "ready": True,
+        "generation": index.generation,
+        "courses": len(index.catalog),
+        "startup_seconds": startup_timings,
+    })
+
+def summary_response(name):
+    """Pre-encoded body ``name`` of the live index, or from the manifest while it loads"""
+    if index_manager is None and name in startup_bodies:
+        return FastJSONResponse(startup_bodies[name])
+    return FastJSONResponse(getattr(current_index(), name))
+
 @app.get("/job_roles", response_model=List[str])
 def get_job_roles():
-    return job_roles
+    return summary_response("job_roles_json")
 
 @app.get("/platforms")
 def get_platforms():
     """Get available platforms"""
-    platforms = list(set([c["provider"] for c in courses]))
-    return {"platforms": platforms}
+    return summary_response("platforms_json")
 
 @app.get("/skills")
 def get_skills():
     """Get available skills"""
-    return {"skills": COMMON_SKILLS}
+    return FastJSONResponse(SKILLS_JSON)
 
-@app.get("/career_path/{job_role}")
-def get_career_path(job_role: str):
-    """Get career path suggestions for a job role"""
-    job_role_lower = job_role.lower()
-    
+def cacheable(request, etag, content):
+    """Respond with ETag/Cache-Control, or 304 if the client already has it"""
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={RESPONSE_MAX_AGE}"}
+    if request is not None and request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(content, headers=headers)
+
+def require_admin(token):
+    if not ADMIN_TOKEN or not token or not secrets.compare_digest(token, ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+@app.post("/admin/reload")
+def reload_index(x_admin_token: Optional[str] = Header(None)):
+    """Rebuild the course index in the background and swap it in when ready"""
+    require_admin(x_admin_token)
+    current_index()
+    started = index_manager.reload_in_background()
+    return {"status": "started" if started else "already_running", **index_manager.status()}
+
+async def run_enrichment(limit):
+    """Enrich the live catalog, then rebuild the index with the results"""
+    from enrichment import enrich_catalog
+    from enrichment_store import EnrichmentStore
+
+    client = LLMClient(gemini_model, ENRICH_CONCURRENCY, GEMINI_TIMEOUT, cache=llm_cache)
+    try:
+        counts = await enrich_catalog(client, index_manager.current.catalog, EnrichmentStore(), limit=limit)
+    except Exception as e:
+        log.error("enrich_failed", error=str(e) or type(e).__name__)
+        raise
+    log.info("enrich_done", model_calls=client.calls, **counts)
+    if counts["enriched"]:
+        index_manager.reload_in_background()
+    return counts
+
+@app.post("/admin/enrich")
+async def start_enrichment(
+    limit: Optional[int] = Query(None, ge=1, description="Only enrich this many pending courses"),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """Enrich the catalog with Gemini in the background and reindex when done"""
+    global enrichment_task
+    require_admin(x_admin_token)
+    current_index()
+    if not gemini_model:
+        raise HTTPException(status_code=503, detail="Gemini API not configured")
+    running = enrichment_task is not None and not enrichment_task.done()
+    if not running:
+        enrichment_task = asyncio.create_task(run_enrichment(limit))
+    return {"status": "already_running" if running else "started", **index_manager.status()}
+
+@app.get("/admin/index")
+def get_index_status(x_admin_token: Optional[str] = Header(None)):
+    """Current index generation and reload state"""
+    require_admin(x_admin_token)
+    current_index()
+    return index_manager.status()
+
+@app.get("/admin/cache")
+def get_cache_status(x_admin_token: Optional[str] = Header(None)):
+    """Gemini response cache hit/miss counters"""
+    require_admin(x_admin_token)
+    return {
+        "llm_cache": llm_cache.stats(),
+        "model_calls": llm_client.calls if llm_client else 0,
+        "recommendations": recommendation_cache.stats(),
+        "career_path": career_path_cache.stats(),
+    }
+
+def career_step(index, role, skill_gap, rows, previous=None):
+    """One transition of a career path with the courses covering its gap"""
+    step = {"role": role, "skill_gap": skill_gap, "courses": index.catalog.records_json(rows)}
+    return step if previous is None else {"from": previous, **step}
+
+def career_path(index, job_role):
+    """Career path suggestions for a job role"""
     # Check if we have a predefined mapping
-    if job_role in JOB_ROLE_MAPPING:
-        role_data = JOB_ROLE_MAPPING[job_role]
-        return {
+    role = ROLES_BY_NAME.get(normalize_role(job_role))
+    if role is not None:
+        role_data = JOB_ROLE_MAPPING[role]
+        result = {
             "current_role": job_role,
             "next_roles": role_data["next_roles"],
             "required_skills": role_data["skills"],
             "relevant_subjects": role_data["subjects"]
         }
-    
-    # For custom roles, generate intelligent career paths
-    next_roles = []
-    required_skills = []
-    relevant_subjects = []
-    
-    # Analyze the job role and suggest career progression
-    if any(word in job_role_lower for word in ["engineer", "developer", "programmer"]):
-        next_roles = ["Senior " + job_role, "Tech Lead", "Software Architect", "Engineering Manager"]
-        required_skills = ["Leadership", "System Design", "Architecture", "Team Management", "Advanced Programming"]
-        relevant_subjects = ["Software Engineering", "Computer Science", "System Design"]
-    elif any(word in job_role_lower for word in ["analyst", "data"]):
-        next_roles = ["Senior " + job_role, "Data Scientist", "Business Intelligence Manager", "Analytics Director"]
-        required_skills = ["Advanced Analytics", "Machine Learning", "Statistics", "Business Intelligence", "Leadership"]
-        relevant_subjects = ["Data Science", "Business Analytics", "Statistics"]
-    elif any(word in job_role_lower for word in ["manager", "lead", "director"]):
-        next_roles = ["Senior " + job_role, "Director", "VP", "C-Level Executive"]
-        required_skills = ["Strategic Planning", "Leadership", "Business Strategy", "Financial Management", "Team Building"]
-        relevant_subjects = ["Business", "Management", "Leadership"]
-    elif any(word in job_role_lower for word in ["designer", "ux", "ui"]):
-        next_roles = ["Senior " + job_role, "Design Lead", "Creative Director", "UX Director"]
-        required_skills = ["Design Systems", "User Research", "Prototyping", "Leadership", "Design Strategy"]
-        relevant_subjects = ["Design", "User Experience", "Visual Design"]
-    elif any(word in job_role_lower for word in ["marketing", "marketer"]):
-        next_roles = ["Senior " + job_role, "Marketing Manager", "Marketing Director", "CMO"]
-        required_skills = ["Digital Marketing", "Analytics", "Strategy", "Leadership", "Campaign Management"]
-        relevant_subjects = ["Marketing", "Digital Marketing", "Business"]
-    elif any(word in job_role_lower for word in ["scientist", "researcher"]):
-        next_roles = ["Senior " + job_role, "Research Lead", "Research Director", "Chief Scientist"]
-        required_skills = ["Advanced Research", "Methodology", "Leadership", "Publication", "Grant Writing"]
-        relevant_subjects = ["Research", "Science", "Methodology"]
-    elif any(word in job_role_lower for word in ["consultant", "advisor"]):
-        next_roles = ["Senior " + job_role, "Principal Consultant", "Partner", "Managing Director"]
-        required_skills = ["Client Management", "Business Development", "Strategy", "Leadership", "Industry Expertise"]
-        relevant_subjects = ["Business", "Consulting", "Strategy"]
-    elif any(word in job_role_lower for word in ["sales", "account"]):
-        next_roles = ["Senior " + job_role, "Sales Manager", "Sales Director", "VP of Sales"]
-        required_skills = ["Sales Strategy", "Team Management", "Business Development", "Leadership", "Customer Success"]
-        relevant_subjects = ["Sales", "Business", "Customer Success"]
-    elif any(word in job_role_lower for word in ["support", "help", "customer"]):
-        next_roles = ["Senior " + job_role, "Support Manager", "Customer Success Manager", "Support Director"]
-        required_skills = ["Customer Success", "Process Improvement", "Leadership", "Analytics", "Team Management"]
-        relevant_subjects = ["Customer Service", "Business", "Process Management"]
-    elif any(word in job_role_lower for word in ["admin", "coordinator", "assistant"]):
-        next_roles = ["Senior " + job_role, "Manager", "Director", "VP"]
-        required_skills = ["Leadership", "Process Management", "Strategic Planning", "Team Management", "Business Acumen"]
-        relevant_subjects = ["Business", "Management", "Administration"]
     else:
-        # Generic career progression for unknown roles
-        next_roles = ["Senior " + job_role, "Lead " + job_role, "Manager", "Director"]
-        required_skills = ["Leadership", "Strategic Thinking", "Communication", "Problem Solving", "Industry Expertise"]
-        relevant_subjects = ["Business", "Leadership", "Industry-specific Skills"]
+        # For custom roles, generate intelligent career paths
+        _, next_roles, required_skills, relevant_subjects = match_career_track(normalize_role(job_role))
+        result = {
+            "current_role": job_role,
+            "next_roles": [role.format(role=job_role) for role in next_roles],
+            "required_skills": required_skills,
+            "relevant_subjects": relevant_subjects
+        }
     
+    steps = index.career_graph.next_steps(role or job_role, result["next_roles"])
+    result["next_steps"] = [career_step(index, *step) for step in steps]
+    return result
+
+def career_route(index, job_role, target_role, max_steps):
+    """Cheapest route between two roles of the career graph, or ``None``"""
+    graph = index.career_graph
+    source, target = graph.find(job_role), graph.find(target_role)
+    if source is None or target is None:
+        return None
+    route = graph.path(source, target, max_steps)
+    if route is None:
+        return None
+    steps = [career_step(index, graph.roles[b], *graph.step(a, b), previous=graph.roles[a]) for a, b in zip(route, route[1:])]
     return {
-        "current_role": job_role,
-        "next_roles": next_roles,
-        "required_skills": required_skills,
-        "relevant_subjects": relevant_subjects
+        "current_role": graph.roles[source],
+        "target_role": graph.roles[target],
+        "steps": steps,
+        "skill_gap": list(dict.fromkeys(skill for step in steps for skill in step["skill_gap"])),
     }
 
+@app.get("/career_path/{job_role}")
+def get_career_path(job_role: str, request: Request = None):
+    """Get career path suggestions for a job role"""
+    index = current_index()
+    key = (index.key, job_role)
+    cached = career_path_cache.get(key)
+    if cached is None:
+        cached = (encode(career_path(index, job_role)), make_etag(*key))
+        career_path_cache.set(key, cached)
+    body, etag = cached
+    return cacheable(request, etag, body)
+
+@app.get("/career_path/{job_role}/to/{target_role}")
+def get_career_route(
+    job_role: str,
+    target_role: str,
+    max_steps: int = Query(MAX_PATH_STEPS, ge=1, le=MAX_PATH_STEPS, description="Most transitions in the route"),
+    request: Request = None
+):
+    """Cheapest multi-step route to a target role, with courses for each step"""
+    index = current_index()
+    key = (index.key, job_role, target_role, max_steps)
+    cached = career_path_cache.get(key)
+    if cached is None:
+        result = career_route(index, job_role, target_role, max_steps)
+        if result is None:
+            raise HTTPException(status_code=404, detail=f"No career path from {job_role} to {target_role} within {max_steps} steps")
+        cached = (encode(result), make_etag(*key))
+        career_path_cache.set(key, cached)
+    body, etag = cached
+    return cacheable(request, etag, body)
+
 @app.get("/ai_courses")
-def get_ai_courses(
+async def get_ai_courses(
     job_role: str = Query(..., description="Job role to find courses for"),
     skills: Optional[str] = Query(None, description="User skills")
 ):
     """Get AI-generated course recommendations using Gemini"""
+    current_index()
+    from enrichment import fetch_courses_with_gemini
+
     if not gemini_model:
         return {"error": "Gemini API not configured", "courses": []}
     
     try:
-        ai_courses = fetch_courses_with_gemini(job_role, skills)
+        with span("gemini"):
+            ai_courses = await fetch_courses_with_gemini(llm_client, job_role, skills)
         return {"courses": ai_courses, "source": "Gemini AI"}
     except Exception as e:
         return {"error": str(e), "courses": []}
 
+def recommend(index, job_role, paid=None, platform=None, skills_list=None, goal=None, depth=RANKING_DEPTH):
+    """Rank the catalog for one query (CPU-bound, no AI enrichment).
+
+    Keeps only the best ``depth`` rows, in order; response pages are sliced
+    from them. Results depend only on the normalized role, ``parse_skills``
+    output and the lowercased goal, which is what the query cache keys on.
+    """
+    # Filter by paid/free and platform using the precomputed partitions
+    with span("filter"):
+        rows = index.course_index.rows(paid, platform)
+    
+    if len(rows) == 0:
+        return {"rows": rows, "skill_matches": rows, "complete": True, "total_filtered": 0}
+    
+    # Relevant subjects, skills and the query vector for the job role
+    with span("profile"):
+        profile = index.role_profiles.get(job_role)
+    relevant_subjects, relevant_skills = profile.subjects, profile.skills
+    
+    # Known roles come pre-ranked when there are no skills or goal to add
+    top = None if skills_list or goal else profile.top_rows(paid, platform, depth)
+    if top is not None:
+        skill_matches = np.zeros(len(top), dtype=np.int32)
+    else:
+        # Combine similarity with subject relevance, popularity, and skill
+        # matching, taking the top rows without sorting the whole catalog
+        top, skill_matches = rank(
+            index, job_role, paid, platform, relevant_subjects, skills_list, goal, k=depth, query=profile.vector
+        )
+    
+    return {
+        "rows": top,
+        "skill_matches": skill_matches,
+        # Fewer than ``depth`` rows means every positive score is in here
+        "complete": len(top) < depth,
+        "total_filtered": len(rows),
+        "relevant_skills": relevant_skills,
+    }
+
+def recommendation_page(index, job_role, ranking, offset, limit, fields, cursor_digest):
+    """Serialise one page of a ranking, with the cursor for the next one"""
+    rows = ranking["rows"][offset:offset + limit]
+    more = len(ranking["rows"]) > offset + limit
+    return {
+        "job_role": job_role,
+        "recommendations": index.catalog.records_json(rows, fields),
+        "total_filtered": ranking["total_filtered"],
+        "relevant_skills": ranking["relevant_skills"],
+        "skill_match_count": int(np.count_nonzero(ranking["skill_matches"][offset:offset + limit])),
+        "next_cursor": encode_cursor(offset + limit, cursor_digest) if more else None,
+    }
+
+def parse_fields(fields):
+    """Course fields to return, or ``None`` for all of them"""
+    from catalog import COURSE_FIELDS
+
+    if not fields:
+        return None
+    names = list(dict.fromkeys(name.strip() for name in fields.split(",") if name.strip()))
+    unknown = [name for name in names if name not in COURSE_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return names or None
+
+def recommend_batch(index, queries):
+    """Score many normalized queries together; yields one result per query.
+
+    All roles are vectorized in one call; ``ScoringEngine.rank_batch``
+    then scores them in chunks, each against every course with one sparse
+    product and the bonuses as matrix operations. Each query keeps its
+    best ``limit`` rows, like the first page of ``/recommendations``.
+    """
+    if not queries:
+        return
+    relevant = [get_relevant_subjects_and_skills(q["job_role"]) for q in queries]
+    filtered = [index.course_index.rows(q["paid"], q["platform"]) for q in queries]
+    ranked = index.scoring_engine.rank_batch(
+        index.course_index.X,
+        index.course_index.vectorizer.transform([q["job_role"] for q in queries]),
+        [subjects for subjects, _ in relevant],
+        [q["skills"] for q in queries],
+        [q["goal"] for q in queries],
+        max(q["limit"] for q in queries),
+        [[rows] for rows in filtered],
+    )
+    for query, (_, skills), rows, [(top, skill_matches)] in zip(queries, relevant, filtered, ranked):
+        if len(rows) == 0:
+            yield {"job_role": query["job_role"], "recommendations": []}
+            continue
+        top, skill_matches = top[:query["limit"]], skill_matches[:query["limit"]]
+        yield {
+            "job_role": query["job_role"],
+            "recommendations": index.catalog.records_json(top),
+            "total_filtered": len(rows),
+            "relevant_skills": skills,
+            "skill_match_count": int(np.count_nonzero(skill_matches)),
+        }
+
+class RecommendationQuery(BaseModel):
+    job_role: str
+    paid: Optional[bool] = None
+    platform: Optional[str] = None
+    user_skills: Optional[str] = None
+    goal: Optional[str] = None
+    limit: int = Field(8, ge=1, le=MAX_PAGE_SIZE)
+
+class BatchRecommendationRequest(BaseModel):
+    queries: List[RecommendationQuery]
+    stream: bool = False
+
+@app.post("/recommendations/batch")
+async def get_recommendations_batch(batch: BatchRecommendationRequest):
+    """Recommendations for many queries in one call (optionally as NDJSON)"""
+    if len(batch.queries) > MAX_BATCH_QUERIES:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_QUERIES} queries per batch")
+    
+    index = current_index()
+    queries = [
+        {
+            "job_role": q.job_role,
+            "paid": q.paid,
+            "platform": q.platform,
+            "skills": parse_skills(q.user_skills),
+            "goal": q.goal.lower() if q.goal else None,
+            "limit": q.limit,
+        }
+        for q in batch.queries
+    ]
+    
+    if batch.stream:
+        async def lines():
+            results = recommend_batch(index, queries)
+            while True:
+                # Each step may score a whole chunk; keep it off the event loop
+                result = await run_in_threadpool(next, results, None)
+                if result is None:
+                    break
+                yield encode({**result, "ai_enhanced": False}) + b"\n"
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+    
+    results = await run_in_threadpool(lambda: list(recommend_batch(index, queries)))
+    return FastJSONResponse({"results": [{**result, "ai_enhanced": False} for result in results]})
+
 @app.get("/recommendations")
-def get_recommendations(
+async def get_recommendations(
     job_role: str = Query(..., description="Current job role"),
     paid: Optional[bool] = Query(None, description="Set to true for paid, false for free, omit for all"),
     platform: Optional[str] = Query(None, description="Filter by platform (Udemy, Coursera, or omit for all)"),
     user_skills: Optional[str] = Query(None, description="Comma-separated list of user skills"),
     goal: Optional[str] = Query(None, description="User's learning goal"),
-    use_ai: Optional[bool] = Query(False, description="Use AI to enhance recommendations")
+    use_ai: Optional[bool] = Query(False, description="Use AI to enhance recommendations"),
+    limit: int = Query(8, ge=1, le=MAX_PAGE_SIZE, description="Number of recommendations per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated course fields to return"),
+    request: Request = None
 ):
-    # Filter by paid/free if specified
-    filtered_courses = [c for c in courses if (paid is None or c["is_paid"] == paid)]
-    
-    # Filter by platform if specified
-    if platform:
-        filtered_courses = [c for c in filtered_courses if c["provider"].lower() == platform.lower()]
-    
-    if not filtered_courses:
-        return {"job_role": job_role, "recommendations": []}
-    
-    # Parse user skills
-    skills_list = []
-    if user_skills:
-        skills_list = [skill.strip() for skill in user_skills.split(",") if skill.strip()]
-    
-    # Get relevant subjects and skills for the job role
-    relevant_subjects, relevant_skills = get_relevant_subjects_and_skills(job_role, skills_list)
+    index = current_index()
+    # Imported by load_index; kept out of module scope for lazy startup
+    from catalog import COURSE_FIELDS
+    from enrichment import enhance_courses_with_gemini
+
+    skills_list = parse_skills(user_skills)
+    goal = goal.lower() if goal else None
+    fields = parse_fields(fields)
+    key = (index.key, normalize_role(job_role), paid, platform.lower() if platform else None, tuple(skills_list), goal)
     
-    # Recompute corpus and X for filtered courses
-    filtered_corpus = course_corpus(filtered_courses)
-    X_filtered = vectorizer.transform(filtered_corpus)
-    job_role_vec = vectorizer.transform([job_role])
-    similarities = cosine_similarity(job_role_vec, X_filtered).flatten()
+    # Cursors are only valid for the query (and index) that issued them
+    cursor_digest = make_etag(*key)
+    offset = 0
+    if cursor:
+        try:
+            offset = decode_cursor(cursor, cursor_digest)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid or expired cursor")
     
-    # Combine similarity with subject relevance, popularity, and skill matching
-    scored_courses = []
-    for i, course in enumerate(filtered_courses):
-        similarity_score = similarities[i]
-        subject_bonus = 0.3 if course["subject"] in relevant_subjects else 0
-        popularity_bonus = min(course["popularity_score"] / 10000, 0.2)
-        
-        # Skill matching bonus
-        skill_bonus = 0
-        if skills_list:
-            skill_match = calculate_skill_match(course, skills_list)
-            skill_bonus = skill_match * 0.4
-        
-        # Goal-based bonus
-        goal_bonus = 0
-        if goal and goal.lower() in course["title"].lower():
-            goal_bonus = 0.3
-        
-        final_score = similarity_score + subject_bonus + popularity_bonus + skill_bonus + goal_bonus
-        scored_courses.append((course, final_score))
+    needed = offset + limit + 1  # one extra row tells whether there is a next page
+    with span("cache"):
+        ranking = recommendation_cache.get(key)
+    if ranking is None or (len(ranking["rows"]) < needed and not ranking["complete"]):
+        depth = max(needed, RANKING_DEPTH, 2 * len(ranking["rows"]) if ranking else 0)
+        # Scoring is CPU-bound; keep it off the event loop
+        ranking = await run_in_threadpool(recommend, index, job_role, paid, platform, skills_list, goal, depth)
+        recommendation_cache.set(key, ranking)
+    if not ranking["total_filtered"]:
+        return FastJSONResponse({"job_role": job_role, "recommendations": []})
     
-    # Sort by final score and return top recommendations
-    scored_courses.sort(key=lambda x: x[1], reverse=True)
-    recommended = [course for course, score in scored_courses if score > 0][:8]
+    with span("serialize"):
+        result = recommendation_page(index, job_role, ranking, offset, limit, fields, cursor_digest)
     
-    # Enhance with AI if requested
-    if use_ai and gemini_model:
-        for course in recommended:
-            course = enhance_course_with_gemini(course)
+    # Enhance with AI if requested, all courses concurrently
+    # Courses enriched offline come from the catalog; only the rest call Gemini
+    if use_ai and (gemini_model or index.enriched_courses):
+        rows = ranking["rows"][offset:offset + limit]
+        courses = index.catalog.records(rows)
+        stored = [index.catalog.enrichment(row) for row in rows]
+        with span("enrichment"):
+            courses = await enhance_courses_with_gemini(llm_client, courses, GEMINI_REQUEST_DEADLINE, stored)
+        if fields:
+            courses = [{name: course[name] for name in [*fields, "ai_enhanced"] if name in course} for course in courses]
+        result["recommendations"] = courses
+        result["ai_enhanced"] = True
+        return FastJSONResponse(result)
     
-    return {
-        "job_role": job_role,
-        "recommendations": recommended,
-        "total_filtered": len(filtered_courses),
-        "relevant_skills": relevant_skills,
-        "skill_match_count": len([c for c in recommended if calculate_skill_match(c, skills_list) > 0]),
-        "ai_enhanced": use_ai and gemini_model is not None
-    }
\ No newline at end of file
+    result["ai_enhanced"] = False
+    etag = make_etag(cursor_digest, job_role, offset, limit, ",".join(fields or COURSE_FIELDS))
+    with span("serialize"):
+        return cacheable(request, etag, result)
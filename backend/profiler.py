@@ -0,0 +1,48 @@
+import collections
+import sys
+import threading
+
+# Leaf functions of threads that are just waiting
+IDLE_FUNCTIONS = {"wait", "select", "poll", "epoll", "sleep", "_recv_into", "accept", "get", "_worker"}
+
+
+class SamplingProfiler:
+    """Samples every thread's stack at a fixed interval while active.
+
+    Results are in the folded format (``frame;frame;frame count``) read by
+    flamegraph.pl and speedscope. Threads sitting in a wait are skipped.
+    """
+
+    def __init__(self, interval=0.002):
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == me or frame.f_code.co_name in IDLE_FUNCTIONS:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{frame.f_lineno})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+
+    def folded(self):
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common()) + "\n"
+
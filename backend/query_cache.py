@@ -0,0 +1,76 @@
+import base64
+import binascii
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+
+def parse_skills(user_skills):
+    """Comma-separated skills as a sorted, deduplicated lowercase list"""
+    if not user_skills:
+        return []
+    return sorted({skill.strip().lower() for skill in user_skills.split(",") if skill.strip()})
+
+
+def make_etag(*parts):
+    digest = hashlib.sha1("\x1f".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:20]}"'
+
+
+def encode_cursor(offset, digest):
+    """Opaque "load more" token: the next offset bound to one query + index"""
+    return base64.urlsafe_b64encode(json.dumps([offset, digest]).encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor, digest):
+    """Offset stored in ``cursor``; ``ValueError`` if it belongs to another query or index"""
+    try:
+        offset, cursor_digest = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (binascii.Error, UnicodeError, TypeError, ValueError):
+        raise ValueError("malformed cursor")
+    if cursor_digest != digest or not isinstance(offset, int) or offset < 0:
+        raise ValueError("cursor does not match this query")
+    return offset
+
+
+class QueryCache:
+    """Thread-safe LRU of computed responses with hit/miss counters.
+
+    Keys must include the index generation key so a reload never serves
+    results computed from an older catalog.
+    """
+
+    def __init__(self, max_entries=2048):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "entries": len(self.entries),
+            }
@@ -0,0 +1,279 @@
+"""Two-stage retrieval for large catalogs.
+
+Stage one collects a few hundred candidate rows per query without touching
+the whole catalog: the best TF-IDF matches from an inverted index with
+MaxScore pruning, the most popular courses, and the best courses carrying
+each bonus the query can earn (relevant subject, requested skill, goal),
+ranked by their full score within just those rows. Stage two runs the
+exact ``ScoringEngine`` on those candidates only.
+
+Check how much of the exact top-k survives with ``python retrieval.py recall``.
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from metrics import span
+from scoring import top_k
+from taxonomy import JOB_ROLE_MAPPING, get_relevant_subjects_and_skills
+
+# Candidates per source (text matches, each subject/skill/goal, popularity)
+RETRIEVAL_CANDIDATES = int(os.getenv("RETRIEVAL_CANDIDATES", "300"))
+# Below this many courses exact scoring is already cheap and stays in use
+TWO_STAGE_MIN_COURSES = int(os.getenv("TWO_STAGE_MIN_COURSES", "50000"))
+
+
+def first_allowed(rows, allowed, n):
+    """First ``n`` entries of ``rows`` whose ``allowed`` flag is set"""
+    found = []
+    count = 0
+    start = 0
+    block = max(4 * n, 64)
+    while start < len(rows) and count < n:
+        chunk = rows[start:start + block]
+        chunk = chunk[allowed[chunk]]
+        found.append(chunk)
+        count += len(chunk)
+        start += block
+        block *= 2
+    if not found:
+        return np.empty(0, dtype=np.intp)
+    return np.concatenate(found)[:n]
+
+
+class CandidateGenerator:
+    """Inverted index and popularity-ordered postings over one bundle.
+
+    The TF-IDF matrix is transposed into per-term postings with each term's
+    maximum weight, courses are pre-sorted by popularity and grouped by
+    subject, so each candidate source scans a short list or one subject's
+    rows.
+    """
+
+    def __init__(self, course_index, skill_index, scoring_engine, n_candidates=RETRIEVAL_CANDIDATES):
+        self.course_index = course_index
+        self.skill_index = skill_index
+        self.scoring_engine = scoring_engine
+        self.n_candidates = n_candidates
+        # Free (scores, seen) accumulators for text_candidates; list append
+        # and pop are atomic, so threads can share the pool without a lock
+        self._accumulators = []
+
+        self.postings = course_index.X.tocsc()
+        self.postings.sort_indices()
+        self.max_weight = np.zeros(self.postings.shape[1])
+        lengths = np.diff(self.postings.indptr)
+        nonempty = lengths > 0
+        self.max_weight[nonempty] = np.maximum.reduceat(self.postings.data, self.postings.indptr[:-1][nonempty])
+
+        popularity = scoring_engine.popularity_bonus
+        self.by_popularity = np.argsort(-popularity, kind="stable")
+        # Group by subject, keeping popularity order inside each group
+        subject_codes = scoring_engine.subject_codes[self.by_popularity]
+        grouped = self.by_popularity[np.argsort(subject_codes, kind="stable")]
+        bounds = np.cumsum(np.bincount(subject_codes[subject_codes >= 0], minlength=len(scoring_engine.subject_ids)))
+        first = np.count_nonzero(subject_codes < 0)
+        self.subject_by_popularity = dict(enumerate(np.split(grouped[first:], bounds[:-1])))
+
+    def __len__(self):
+        return len(self.by_popularity)
+
+    def text_candidates(self, query, allowed, n):
+        """Best ``n`` allowed rows by TF-IDF similarity to ``query``.
+
+        Term-at-a-time over the query's postings, highest upper bound first,
+        with MaxScore pruning: once the remaining terms' summed upper bounds
+        fall below the current n-th best partial score, no unseen course can
+        reach the top ``n``. Those terms' postings are then not scanned;
+        the courses already seen are looked up in them by binary search.
+        """
+        terms, weights = query.indices, query.data
+        if len(terms) == 0:
+            return np.empty(0, dtype=np.intp)
+        bounds = weights * self.max_weight[terms]
+        order = np.argsort(-bounds, kind="stable")
+        remaining = np.cumsum(bounds[order][::-1])[::-1]
+
+        # Preallocated per concurrent query; only touched entries are reset
+        try:
+            scores, seen = self._accumulators.pop()
+        except IndexError:
+            scores, seen = np.zeros(len(self)), np.zeros(len(self), dtype=bool)
+        found = []
+        try:
+            count = 0
+            threshold = 0.0
+            pruned = len(order)
+            for i, position in enumerate(order):
+                if remaining[i] < threshold:
+                    pruned = i
+                    break
+                start, end = self.postings.indptr[terms[position]], self.postings.indptr[terms[position] + 1]
+                docs = self.postings.indices[start:end]
+                keep = allowed[docs]
+                docs = docs[keep]
+                scores[docs] += self.postings.data[start:end][keep] * weights[position]
+                new = docs[~seen[docs]]
+                seen[new] = True
+                found.append(new)
+                count += len(new)
+                if count > n:
+                    found = [np.concatenate(found)]
+                    threshold = np.partition(scores[found[0]], -n)[-n]
+            candidates = np.concatenate(found) if found else np.empty(0, dtype=np.intp)
+
+            for position in order[pruned:]:
+                start, end = self.postings.indptr[terms[position]], self.postings.indptr[terms[position] + 1]
+                docs = self.postings.indices[start:end]
+                at = np.searchsorted(docs, candidates)
+                hit = at < len(docs)
+                hit[hit] = docs[at[hit]] == candidates[hit]
+                scores[candidates[hit]] += self.postings.data[start:end][at[hit]] * weights[position]
+            candidates = candidates[top_k(scores[candidates], n)]
+        finally:
+            for rows in found:
+                scores[rows] = 0.0
+                seen[rows] = False
+            self._accumulators.append((scores, seen))
+        return candidates
+
+    def subject_candidates(self, query, subject_id, allowed, n):
+        """Best ``n`` allowed rows of one subject by similarity plus popularity.
+
+        Rows of one subject share its bonus, so for those without a skill
+        or goal bonus (ranked by the bonus source) this is their exact order.
+        """
+        rows = self.subject_by_popularity[subject_id]
+        rows = rows[allowed[rows]]
+        if len(rows) <= n:
+            return rows
+        scores = self.course_index.vector_similarities(query, rows) + self.scoring_engine.popularity_bonus[rows]
+        return rows[top_k(scores, n)]
+
+    def candidates(self, query, allowed, relevant_subjects, skills=None, goal=None, n=None):
+        """Sorted candidate row ids for one query, all within ``allowed``"""
+        n = n or self.n_candidates
+        # Text matches go deeper than the bonus sources since most of the
+        # ranking signal, and most near-ties, come from similarity
+        sources = [
+            self.text_candidates(query, allowed, 4 * n),
+            first_allowed(self.by_popularity, allowed, n),
+        ]
+        subject_ids = self.scoring_engine.subject_ids
+        for subject in relevant_subjects:
+            if subject in subject_ids:
+                sources.append(self.subject_candidates(query, subject_ids[subject], allowed, n))
+
+        # Every course earning a skill or goal bonus, ranked by its full
+        # score: bonus rows with near-tied priors are told apart by similarity
+        bonus_rows = [self.skill_index.rows(skill) for skill in skills or []]
+        if goal:
+            bonus_rows.append(np.flatnonzero(self.scoring_engine.goal_column(goal.lower())))
+        if bonus_rows:
+            rows = np.unique(np.concatenate(bonus_rows))
+            rows = rows[allowed[rows]]
+            similarities = self.course_index.vector_similarities(query, rows)
+            scores, _ = self.scoring_engine.score(rows, similarities, relevant_subjects, skills, goal)
+            sources.append(rows[top_k(scores, n)])
+        return np.unique(np.concatenate(sources)).astype(np.intp)
+
+
+def rank(index, job_role, paid, platform, relevant_subjects, skills=None, goal=None, k=8, two_stage=None, query=None):
+    """Top ``k`` positive-scoring rows for one query and their skill match counts.
+
+    Scores only the retrieved candidates when the bundle has a
+    ``CandidateGenerator`` (or ``two_stage`` is true), otherwise every row
+    passing the filters. ``query`` is the transformed ``job_role`` if the
+    caller already has it.
+    """
+    course_index = index.course_index
+    if query is None:
+        with span("vectorize"):
+            query = course_index.query_vector(job_role)
+    if two_stage is None:
+        two_stage = index.candidates is not None
+    if two_stage:
+        with span("candidates"):
+            generator = index.candidates or CandidateGenerator(course_index, index.skill_index, index.scoring_engine)
+            allowed = course_index.mask(paid, platform)
+            rows = generator.candidates(query, allowed, relevant_subjects, skills, goal, max(generator.n_candidates, k))
+    else:
+        rows = course_index.rows(paid, platform)
+
+    with span("similarity"):
+        similarities = course_index.vector_similarities(query, rows)
+    with span("bonus"):
+        scores, skill_matches = index.scoring_engine.score(rows, similarities, relevant_subjects, skills, goal)
+    with span("top_k"):
+        positive = np.flatnonzero(scores > 0)
+        top = positive[top_k(scores[positive], k)]
+    return rows[top], skill_matches[top]
+
+
+def recall_queries(index):
+    """Representative (job_role, paid, platform, skills, goal) queries"""
+    roles = list(JOB_ROLE_MAPPING) + index.job_roles + ["Cloud Architect", "Ethical Hacker", "Product Designer"]
+    platforms = [None] + sorted({p.lower() for p in index.catalog.unique("provider")})
+    skill_sets = [[], ["python", "sql"], ["leadership"], ["react", "docker"]]
+    goals = [None, None, "beginner", "advanced"]
+    queries = []
+    for i, role in enumerate(roles):
+        for paid in (None, True, False):
+            for platform in platforms:
+                variant = (i + len(queries)) % len(skill_sets)
+                queries.append((role, paid, platform, skill_sets[variant], goals[variant]))
+    return queries
+
+
+def recall_at_k(index, queries, k=8, n=None):
+    """Mean and worst recall@k of two-stage ranking against exact scoring"""
+    generator = CandidateGenerator(index.course_index, index.skill_index, index.scoring_engine, n or RETRIEVAL_CANDIDATES)
+    original = index.candidates
+    recalls = []
+    timings = {"exact": 0.0, "two_stage": 0.0}
+    try:
+        index.candidates = generator
+        for job_role, paid, platform, skills, goal in queries:
+            subjects, _ = get_relevant_subjects_and_skills(job_role)
+            start = time.perf_counter()
+            exact, _ = rank(index, job_role, paid, platform, subjects, skills, goal, k, two_stage=False)
+            timings["exact"] += time.perf_counter() - start
+            start = time.perf_counter()
+            approx, _ = rank(index, job_role, paid, platform, subjects, skills, goal, k, two_stage=True)
+            timings["two_stage"] += time.perf_counter() - start
+            if len(exact):
+                recalls.append(len(np.intersect1d(exact, approx)) / len(exact))
+    finally:
+        index.candidates = original
+    recalls = np.array(recalls) if recalls else np.ones(1)
+    return {
+        "queries": len(queries),
+        "recall_mean": float(recalls.mean()),
+        "recall_min": float(recalls.min()),
+        "exact_ms": 1000 * timings["exact"] / max(len(queries), 1),
+        "two_stage_ms": 1000 * timings["two_stage"] / max(len(queries), 1),
+    }
+
+
+if __name__ == "__main__":
+    from artifact import load_or_build
+
+    parser = argparse.ArgumentParser(description="Course retrieval tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    recall = sub.add_parser("recall", help="Compare two-stage ranking with exact scoring")
+    recall.add_argument("-k", type=int, default=8)
+    recall.add_argument("--candidates", type=int, default=RETRIEVAL_CANDIDATES)
+    recall.add_argument("--min-recall", type=float, default=None, help="Exit 1 if the worst query's recall is lower")
+    args = parser.parse_args()
+
+    bundle = load_or_build()
+    report = recall_at_k(bundle, recall_queries(bundle), k=args.k, n=args.candidates)
+    print(
+        f"recall@{args.k} over {report['queries']} queries: mean {report['recall_mean']:.4f}, "
+        f"min {report['recall_min']:.4f}; exact {report['exact_ms']:.2f} ms/query, "
+        f"two-stage {report['two_stage_ms']:.2f} ms/query"
+    )
+    if args.min_recall is not None and report["recall_min"] < args.min_recall:
+        raise SystemExit(f"recall_min {report['recall_min']:.4f} is below {args.min_recall}")
@@ -0,0 +1,144 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from scipy import sparse
+
+from metrics import span
+from taxonomy import JOB_ROLE_MAPPING, get_relevant_subjects_and_skills, normalize_role
+
+# Rows ranked ahead of time per known role and filter partition (0 disables)
+ROLE_TOP_N = int(os.getenv("ROLE_TOP_N", "64"))
+
+
+class RoleProfile:
+    """Everything a query needs about one job role, computed once"""
+
+    __slots__ = ("name", "vector", "subjects", "skills", "top")
+
+    def __init__(self, name, vector, subjects, skills):
+        self.name = name
+        self.vector = vector
+        self.subjects = subjects
+        self.skills = skills
+        # (paid, platform) -> best rows for a query without skills or goal
+        self.top = {}
+
+    def top_rows(self, paid, platform, depth):
+        """Precomputed best ``depth`` rows for a filter, or ``None``"""
+        rows = self.top.get((paid, platform.lower() if platform else None))
+        if rows is None or (len(rows) < depth and len(rows) == ROLE_TOP_N):
+            return None
+        return rows[:depth]
+
+
+class RoleProfileIndex:
+    """Role profiles for ``JOB_ROLE_MAPPING`` and the catalog's ``job_roles``.
+
+    Known roles are vectorised in one ``transform`` call and ranked for
+    every paid x platform partition with one batched scoring pass, so a
+    known-role query without skills or goal is a dictionary lookup. The
+    rankings are saved with the index artifact and otherwise computed on
+    first use. Other roles get a profile on first use, kept in an LRU.
+    """
+
+    def __init__(self, course_index, scoring_engine, roles, cache_size=4096):
+        self.course_index = course_index
+        self.scoring_engine = scoring_engine
+        self.known = {}
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+
+        names = list(dict.fromkeys([*JOB_ROLE_MAPPING, *roles]))
+        vectors = course_index.vectorizer.transform(names)
+        for i, name in enumerate(names):
+            self.known.setdefault(normalize_role(name), self._profile(name, vectors[i]))
+        # Inputs of the rankings; saved rankings are reused only if they
+        # were computed from the same ones
+        self.partition_keys = list(course_index.partitions)
+        inputs = [ROLE_TOP_N, [[p.name, p.subjects] for p in self.known.values()], self.partition_keys]
+        self.top_digest = hashlib.sha256(json.dumps(inputs).encode("utf-8")).hexdigest()[:16]
+        self._ranked = ROLE_TOP_N <= 0
+        self._rank_lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.known)
+
+    @staticmethod
+    def _profile(name, vector):
+        subjects, skills = get_relevant_subjects_and_skills(name)
+        return RoleProfile(name, vector, subjects, skills)
+
+    def _rank_known(self):
+        if self._ranked:
+            return
+        with self._rank_lock:
+            if self._ranked:
+                return
+            profiles = list(self.known.values())
+            queries = sparse.vstack([profile.vector for profile in profiles], format="csr")
+            partitions = [self.course_index.partitions[key] for key in self.partition_keys]
+            ranked = self.scoring_engine.rank_batch(
+                self.course_index.X, queries, [p.subjects for p in profiles], [[] for _ in profiles],
+                [None for _ in profiles], ROLE_TOP_N, [partitions] * len(profiles),
+            )
+            for profile, tops in zip(profiles, ranked):
+                for key, (rows, _) in zip(self.partition_keys, tops):
+                    profile.top[key] = rows
+            self._ranked = True
+
+    def save(self, path):
+        """Write the known roles' rankings under ``path`` as ``.npy`` arrays"""
+        self._rank_known()
+        os.makedirs(path, exist_ok=True)
+        rows = [profile.top.get(key, []) for profile in self.known.values() for key in self.partition_keys]
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum([len(r) for r in rows], out=offsets[1:])
+        np.save(os.path.join(path, "top.offsets.npy"), offsets)
+        np.save(os.path.join(path, "top.rows.npy"), np.concatenate(rows or [[]]).astype(np.intp))
+        with open(os.path.join(path, "roles.json"), "w") as f:
+            json.dump({"top_digest": self.top_digest}, f)
+
+    def restore(self, path, mmap_mode="r"):
+        """Use the rankings saved under ``path`` if they match these roles and partitions"""
+        try:
+            with open(os.path.join(path, "roles.json")) as f:
+                if json.load(f).get("top_digest") != self.top_digest:
+                    return False
+            offsets = np.load(os.path.join(path, "top.offsets.npy"))
+            rows = np.load(os.path.join(path, "top.rows.npy"), mmap_mode=mmap_mode)
+        except (OSError, ValueError):
+            return False
+        n = len(self.partition_keys)
+        with self._rank_lock:
+            for i, profile in enumerate(self.known.values()):
+                for j, key in enumerate(self.partition_keys):
+                    profile.top[key] = rows[offsets[i * n + j]:offsets[i * n + j + 1]]
+            self._ranked = True
+        return True
+
+    def get(self, job_role):
+        """Profile for ``job_role``: a known one, or built and memoised"""
+        key = normalize_role(job_role)
+        profile = self.known.get(key)
+        if profile is not None:
+            self._rank_known()
+            return profile
+
+        with self._lock:
+            profile = self._cache.get(key)
+            if profile is not None:
+                self._cache.move_to_end(key)
+                return profile
+        with span("vectorize"):
+            vector = self.course_index.query_vector(job_role)
+        profile = self._profile(job_role, vector)
+        with self._lock:
+            self._cache[key] = profile
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return profile
@@ -0,0 +1,123 @@
+from functools import lru_cache
+
+import numpy as np
+
+SUBJECT_BONUS = 0.3
+MAX_POPULARITY_BONUS = 0.2
+SKILL_BONUS = 0.4
+GOAL_BONUS = 0.3
+# Keep the dense courses x queries score matrix around 64 MB while ranking
+SCORE_CELLS = 8_000_000
+
+
+def top_k(scores, k):
+    """Indices of the ``k`` highest scores, highest first.
+
+    Uses ``np.argpartition`` instead of a full sort; ties keep catalog order,
+    matching a stable descending sort.
+    """
+    if k <= 0 or len(scores) == 0:
+        return np.empty(0, dtype=np.intp)
+    if len(scores) > k:
+        kth = np.argpartition(-scores, k - 1)[:k]
+        candidates = np.flatnonzero(scores >= scores[kth].min())
+    else:
+        candidates = np.arange(len(scores))
+    order = np.lexsort((candidates, -scores[candidates]))
+    return candidates[order][:k]
+
+
+class ScoringEngine:
+    """Per-course ranking features held as NumPy columns.
+
+    Subject, popularity and text columns are extracted once from the catalog
+    so every bonus in ``/recommendations`` is an array operation over the
+    filtered rows rather than a Python loop over course dicts.
+    """
+
+    def __init__(self, catalog, skill_index):
+        self.subject_ids = {s: i for i, s in enumerate(catalog.categories["subject"])}
+        self.subject_codes = catalog.codes["subject"]
+
+        popularity = catalog.column("popularity_score").astype(float)
+        self.popularity_bonus = np.minimum(np.nan_to_num(popularity) / 10000, MAX_POPULARITY_BONUS)
+
+        # Packed lowercase titles, shared (memory-mapped) between workers
+        self.titles = catalog.search["title"]
+        self.skill_index = skill_index
+
+        self.goal_column = lru_cache(maxsize=1024)(self._goal_column)
+
+    def _goal_column(self, goal):
+        """Boolean column: which course titles contain ``goal`` (lowercase)"""
+        return self.titles.contains(goal)
+
+    def subject_mask(self, subjects, rows=None):
+        codes = [self.subject_ids[s] for s in subjects if s in self.subject_ids]
+        return np.isin(self.subject_codes if rows is None else self.subject_codes[rows], codes)
+
+    def score(self, rows, similarities, relevant_subjects, skills=None, goal=None):
+        """Final scores for ``rows`` plus the per-row skill match counts"""
+        scores = similarities + SUBJECT_BONUS * self.subject_mask(relevant_subjects, rows)
+        scores += self.popularity_bonus[rows]
+
+        skill_matches = np.zeros(len(rows), dtype=np.int32)
+        if skills:
+            skill_matches = self.skill_index.match_counts(skills)[rows]
+            scores += SKILL_BONUS * skill_matches / len(skills)
+
+        if goal:
+            scores += GOAL_BONUS * self.goal_column(goal.lower())[rows]
+
+        return scores, skill_matches
+
+    def score_batch(self, similarities, relevant_subjects, skill_lists, goals):
+        """``score`` for many queries at once, as matrix operations.
+
+        ``similarities`` is courses x queries; the other arguments hold one
+        entry per query. Returns (scores, skill_matches), both courses x
+        queries.
+        """
+        n_queries = similarities.shape[1]
+        subject_table = np.zeros((len(self.subject_ids), n_queries), dtype=bool)
+        for j, subjects in enumerate(relevant_subjects):
+            codes = [self.subject_ids[s] for s in subjects if s in self.subject_ids]
+            subject_table[codes, j] = True
+        scores = similarities + SUBJECT_BONUS * subject_table[self.subject_codes]
+        scores += self.popularity_bonus[:, None]
+
+        skill_matches = self.skill_index.match_count_matrix(skill_lists)
+        skill_counts = np.array([len(skills) for skills in skill_lists])
+        with_skills = skill_counts > 0
+        scores[:, with_skills] += SKILL_BONUS * skill_matches[:, with_skills] / skill_counts[with_skills]
+
+        for j, goal in enumerate(goals):
+            if goal:
+                scores[:, j] += GOAL_BONUS * self.goal_column(goal.lower())
+        return scores, skill_matches
+
+    def rank_batch(self, X, queries, relevant_subjects, skill_lists, goals, k, row_sets=None):
+        """Best ``k`` positively scored rows for each query, scored in chunks.
+
+        ``queries`` holds one TF-IDF row per query, compared against the
+        course matrix ``X``; the other arguments hold one entry per query.
+        ``row_sets[j]`` lists the row arrays query ``j`` is ranked within
+        (all rows by default). Yields, per query, one (rows, skill match
+        counts) pair per row set.
+        """
+        chunk_size = max(1, SCORE_CELLS // max(X.shape[0], 1))
+        for start in range(0, queries.shape[0], chunk_size):
+            end = start + chunk_size
+            similarities = (X @ queries[start:end].T).toarray()
+            scores, skill_matches = self.score_batch(
+                similarities, relevant_subjects[start:end], skill_lists[start:end], goals[start:end]
+            )
+            for j in range(similarities.shape[1]):
+                ranked = []
+                for rows in [None] if row_sets is None else row_sets[start + j]:
+                    column = scores[:, j] if rows is None else scores[rows, j]
+                    positive = np.flatnonzero(column > 0)
+                    top = positive[top_k(column[positive], k)]
+                    top = top if rows is None else rows[top]
+                    ranked.append((top, skill_matches[top, j]))
+                yield ranked
@@ -0,0 +1,91 @@
+import numpy as np
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+
+def course_corpus(catalog):
+    """Build the text used for TF-IDF (title + subject + level + description + AI skills)"""
+    columns = zip(
+        catalog.column("title"), catalog.column("subject"), catalog.column("level"),
+        catalog.descriptions(), catalog.column("ai_skills"),
+    )
+    return [
+        f"{title} {subject} {level} {description} {skills}" if skills else f"{title} {subject} {level} {description}"
+        for title, subject, level, description, skills in columns
+    ]
+
+
+class CourseIndex:
+    """TF-IDF matrix over the catalog plus precomputed row partitions.
+
+    Every ``paid`` x ``platform`` filter combination maps to a fixed array of
+    row ids, so a request only slices rows of the matrix built at startup and
+    does a single sparse dot product against the query vector.
+    """
+
+    def __init__(self, catalog, vectorizer=None, X=None, max_features=1000):
+        self.catalog = catalog
+        if vectorizer is None:
+            vectorizer = TfidfVectorizer(max_features=max_features, stop_words='english')
+            X = vectorizer.fit_transform(course_corpus(catalog))
+        self.vectorizer = vectorizer
+        # Rows are L2-normalised, so a dot product with a transformed query
+        # is exactly the cosine similarity.
+        self.X = X.tocsr()
+        self.masks = self._build_masks(catalog)
+        self.partitions = {key: np.flatnonzero(mask) for key, mask in self.masks.items()}
+
+    @staticmethod
+    def _build_masks(catalog):
+        is_paid = catalog.column("is_paid").astype(bool)
+        provider_codes = catalog.codes["provider"]
+        paid_masks = {
+            None: np.ones(len(catalog), dtype=bool),
+            True: is_paid,
+            False: ~is_paid,
+        }
+        platform_masks = {None: np.ones(len(catalog), dtype=bool)}
+        for code, provider in enumerate(catalog.categories["provider"]):
+            mask = provider_codes == code
+            key = provider.lower()
+            platform_masks[key] = platform_masks.get(key, False) | mask
+
+        masks = {}
+        for paid, paid_mask in paid_masks.items():
+            for platform, platform_mask in platform_masks.items():
+                masks[(paid, platform)] = paid_mask & platform_mask
+        return masks
+
+    def rows(self, paid=None, platform=None):
+        """Row ids of courses matching the paid/platform filters"""
+        key = (paid, platform.lower() if platform else None)
+        return self.partitions.get(key, np.empty(0, dtype=np.intp))
+
+    def mask(self, paid=None, platform=None):
+        """Boolean column of courses matching the paid/platform filters"""
+        key = (paid, platform.lower() if platform else None)
+        mask = self.masks.get(key)
+        return mask if mask is not None else np.zeros(self.X.shape[0], dtype=bool)
+
+    def query_vector(self, text):
+        return self.vectorizer.transform([text])
+
+    def similarities(self, text, rows):
+        """Cosine similarity between ``text`` and the given course rows"""
+        return self.vector_similarities(self.query_vector(text), rows)
+
+    def vector_similarities(self, query, rows):
+        """Cosine similarity between a transformed query and the given rows"""
+        if len(rows) * 8 < self.X.shape[0]:
+            return (self.X[rows] @ query.T).toarray().ravel()
+        # Slicing a large share of the rows copies most of the matrix;
+        # one matrix-vector product over all of them is several times faster
+        return (self.X @ query.toarray().ravel())[rows]
+
+    def similarity_matrix(self, texts):
+        """Cosine similarities of every course (rows) to every text (columns).
+
+        All texts are vectorised in one ``transform`` call and scored with a
+        single sparse product.
+        """
+        queries = self.vectorizer.transform(texts)
+        return (self.X @ queries.T).toarray()
@@ -0,0 +1,94 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from scipy import sparse
+
+
+class SkillIndex:
+    """Course x skill incidence matrix built once at load time.
+
+    Known skills (``COMMON_SKILLS`` plus every ``JOB_ROLE_MAPPING`` skill) are
+    precomputed as sparse columns, so matching them is a column lookup. Any
+    other user-supplied skill is matched once against the whole catalog and
+    cached by its lowercase string.
+    """
+
+    def __init__(self, catalog, skills, matrix=None, cache_size=1024):
+        self.catalog = catalog
+        self.skills = list(dict.fromkeys(skills))
+        self.skill_ids = {}
+        for skill in self.skills:
+            self.skill_ids.setdefault(skill.lower(), len(self.skill_ids))
+
+        if matrix is None:
+            columns = [self._match_column(skill) for skill in self.skill_ids]
+            dense = np.column_stack(columns) if columns else np.zeros((len(catalog), 0), dtype=bool)
+            matrix = sparse.csc_matrix(dense, dtype=np.int8)
+        self.matrix = matrix
+
+        self._cache = OrderedDict()
+        self._cache_size = cache_size
+        # column() runs concurrently from the threadpool
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self.matrix.shape[0]
+
+    def _match_column(self, skill_lower):
+        return self.catalog.search["skill_text"].contains(skill_lower)
+
+    def column(self, skill):
+        """Boolean column of courses mentioning ``skill``"""
+        key = skill.lower()
+        skill_id = self.skill_ids.get(key)
+        if skill_id is not None:
+            return self.matrix[:, skill_id].toarray().ravel().astype(bool)
+
+        with self._lock:
+            column = self._cache.get(key)
+            if column is not None:
+                self._cache.move_to_end(key)
+                return column
+        column = self._match_column(key)
+        with self._lock:
+            self._cache[key] = column
+            if len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+        return column
+
+    def rows(self, skill):
+        """Row ids of courses mentioning ``skill``"""
+        skill_id = self.skill_ids.get(skill.lower())
+        if skill_id is not None:
+            start, end = self.matrix.indptr[skill_id], self.matrix.indptr[skill_id + 1]
+            return np.asarray(self.matrix.indices[start:end], dtype=np.intp)
+        return np.flatnonzero(self.column(skill))
+
+    def match_counts(self, skills):
+        """Number of ``skills`` mentioned by each course"""
+        counts = np.zeros(len(self), dtype=np.int32)
+        known = [self.skill_ids[s.lower()] for s in skills if s.lower() in self.skill_ids]
+        if known:
+            # Repeated ids are intentional: a skill listed twice counts twice
+            counts += np.asarray(self.matrix[:, known].sum(axis=1), dtype=np.int32).ravel()
+        for skill in skills:
+            if skill.lower() not in self.skill_ids:
+                counts += self.column(skill)
+        return counts
+
+    def match_count_matrix(self, skill_lists):
+        """Match counts of every course (rows) for each skill list (columns)"""
+        indicator = np.zeros((len(self.skill_ids), len(skill_lists)), dtype=np.int32)
+        unknown = []
+        for j, skills in enumerate(skill_lists):
+            for skill in skills:
+                skill_id = self.skill_ids.get(skill.lower())
+                if skill_id is None:
+                    unknown.append((j, skill))
+                else:
+                    indicator[skill_id, j] += 1
+        counts = np.asarray(self.matrix @ indicator, dtype=np.int32)
+        for j, skill in unknown:
+            counts[:, j] += self.column(skill)
+        return counts
@@ -0,0 +1,250 @@
+import re
+from functools import lru_cache
+
+# Enhanced job role to subject mapping with skills
+JOB_ROLE_MAPPING = {
+    "Software Engineer": {
+        "subjects": ["Web Development", "Programming Languages", "Software Engineering"],
+        "skills": ["Python", "JavaScript", "Java", "React", "Node.js", "SQL", "Git", "Docker"],
+        "next_roles": ["Senior Software Engineer", "Full Stack Developer", "Backend Engineer", "DevOps Engineer"]
+    },
+    "Data Scientist": {
+        "subjects": ["Data Science", "Machine Learning", "Business Analytics"],
+        "skills": ["Python", "R", "SQL", "Machine Learning", "Statistics", "Pandas", "Scikit-learn", "TensorFlow"],
+        "next_roles": ["Senior Data Scientist", "ML Engineer", "Data Engineer", "AI Engineer"]
+    },
+    "Product Manager": {
+        "subjects": ["Business", "Product Management", "Marketing"],
+        "skills": ["Product Strategy", "User Research", "Agile", "SQL", "Analytics", "Leadership", "Communication"],
+        "next_roles": ["Senior Product Manager", "Product Director", "VP Product", "Entrepreneur"]
+    },
+    "Digital Marketer": {
+        "subjects": ["Marketing", "Business", "Digital Marketing"],
+        "skills": ["SEO", "Google Ads", "Social Media", "Analytics", "Content Marketing", "Email Marketing"],
+        "next_roles": ["Marketing Manager", "Digital Marketing Director", "Growth Hacker", "Marketing Consultant"]
+    },
+    "Graphic Designer": {
+        "subjects": ["Design", "Graphic Design", "Web Design"],
+        "skills": ["Photoshop", "Illustrator", "InDesign", "UI/UX", "Typography", "Color Theory"],
+        "next_roles": ["Senior Designer", "Art Director", "UX Designer", "Creative Director"]
+    },
+    "Business Analyst": {
+        "subjects": ["Business", "Business Analytics", "Data Science"],
+        "skills": ["SQL", "Excel", "Tableau", "Power BI", "Business Intelligence", "Requirements Analysis"],
+        "next_roles": ["Senior Business Analyst", "Data Analyst", "Product Manager", "Business Intelligence Manager"]
+    },
+    "DevOps Engineer": {
+        "subjects": ["IT & Software", "Software Engineering", "Web Development"],
+        "skills": ["Docker", "Kubernetes", "AWS", "CI/CD", "Linux", "Python", "Shell Scripting"],
+        "next_roles": ["Senior DevOps Engineer", "Site Reliability Engineer", "Cloud Architect", "DevOps Manager"]
+    },
+    "UX Designer": {
+        "subjects": ["Design", "Web Design", "User Experience"],
+        "skills": ["Figma", "Sketch", "User Research", "Prototyping", "Information Architecture", "Usability Testing"],
+        "next_roles": ["Senior UX Designer", "UX Manager", "Product Designer", "UX Director"]
+    },
+    "Data Analyst": {
+        "subjects": ["Data Science", "Business Analytics", "Business"],
+        "skills": ["SQL", "Excel", "Python", "Tableau", "Power BI", "Statistics", "Data Visualization"],
+        "next_roles": ["Senior Data Analyst", "Business Intelligence Analyst", "Data Scientist", "Analytics Manager"]
+    },
+    "Project Manager": {
+        "subjects": ["Business", "Project Management", "Leadership"],
+        "skills": ["Agile", "Scrum", "JIRA", "Risk Management", "Leadership", "Communication", "Budgeting"],
+        "next_roles": ["Senior Project Manager", "Program Manager", "Project Director", "Portfolio Manager"]
+    },
+    "Frontend Developer": {
+        "subjects": ["Web Development", "Programming Languages", "Design"],
+        "skills": ["HTML", "CSS", "JavaScript", "React", "Vue.js", "Angular", "Responsive Design"],
+        "next_roles": ["Senior Frontend Developer", "Full Stack Developer", "Frontend Architect", "UI Developer"]
+    },
+    "Backend Developer": {
+        "subjects": ["Web Development", "Programming Languages", "Software Engineering"],
+        "skills": ["Python", "Java", "Node.js", "SQL", "APIs", "Database Design", "Server Management"],
+        "next_roles": ["Senior Backend Developer", "Full Stack Developer", "Backend Architect", "API Developer"]
+    },
+    "Full Stack Developer": {
+        "subjects": ["Web Development", "Programming Languages", "Software Engineering"],
+        "skills": ["HTML", "CSS", "JavaScript", "Python", "Node.js", "SQL", "React", "APIs"],
+        "next_roles": ["Senior Full Stack Developer", "Tech Lead", "Software Architect", "Engineering Manager"]
+    },
+    "Mobile Developer": {
+        "subjects": ["Mobile Development", "Programming Languages", "Software Engineering"],
+        "skills": ["Swift", "Kotlin", "React Native", "Flutter", "Mobile UI", "App Store", "Firebase"],
+        "next_roles": ["Senior Mobile Developer", "Mobile Architect", "iOS/Android Lead", "Mobile Engineering Manager"]
+    },
+    "AI Engineer": {
+        "subjects": ["Machine Learning", "Data Science", "Programming Languages"],
+        "skills": ["Python", "TensorFlow", "PyTorch", "Machine Learning", "Deep Learning", "NLP", "Computer Vision"],
+        "next_roles": ["Senior AI Engineer", "ML Engineer", "AI Research Scientist", "AI Product Manager"]
+    },
+    "Cybersecurity Analyst": {
+        "subjects": ["IT & Software", "Network & Security", "Software Engineering"],
+        "skills": ["Network Security", "Penetration Testing", "SIEM", "Incident Response", "Compliance", "Cryptography"],
+        "next_roles": ["Senior Security Analyst", "Security Engineer", "Security Manager", "CISO"]
+    },
+    "Cloud Engineer": {
+        "subjects": ["IT & Software", "Software Engineering", "Web Development"],
+        "skills": ["AWS", "Azure", "GCP", "Docker", "Kubernetes", "Terraform", "Linux", "Networking"],
+        "next_roles": ["Senior Cloud Engineer", "Cloud Architect", "DevOps Engineer", "Cloud Manager"]
+    },
+    "QA Engineer": {
+        "subjects": ["Software Engineering", "IT & Software", "Web Development"],
+        "skills": ["Manual Testing", "Automated Testing", "Selenium", "JIRA", "Test Planning", "API Testing"],
+        "next_roles": ["Senior QA Engineer", "Test Lead", "QA Manager", "Test Automation Engineer"]
+    }
+}
+
+# Common skills for skill extraction
+COMMON_SKILLS = [
+    "Python", "JavaScript", "Java", "React", "Node.js", "SQL", "Git", "Docker", "AWS", "Machine Learning",
+    "Data Science", "HTML", "CSS", "Angular", "Vue.js", "PHP", "C++", "C#", "Ruby", "Go", "Rust",
+    "Swift", "Kotlin", "Flutter", "React Native", "TensorFlow", "PyTorch", "Pandas", "NumPy", "Scikit-learn",
+    "Tableau", "Power BI", "Excel", "Agile", "Scrum", "JIRA", "Figma", "Sketch", "Photoshop", "Illustrator",
+    "SEO", "Google Ads", "Social Media", "Content Marketing", "Email Marketing", "Analytics", "Leadership"
+]
+
+# Every skill the skill index precomputes a column for
+KNOWN_SKILLS = COMMON_SKILLS + [skill for data in JOB_ROLE_MAPPING.values() for skill in data["skills"]]
+
+# Career tracks for custom roles, checked in order: (keywords, next roles
+# with "{role}" standing for the user's role, required skills, subjects)
+CAREER_TRACKS = [
+    (
+        ["engineer", "developer", "programmer"],
+        ["Senior {role}", "Tech Lead", "Software Architect", "Engineering Manager"],
+        ["Leadership", "System Design", "Architecture", "Team Management", "Advanced Programming"],
+        ["Software Engineering", "Computer Science", "System Design"],
+    ),
+    (
+        ["analyst", "data"],
+        ["Senior {role}", "Data Scientist", "Business Intelligence Manager", "Analytics Director"],
+        ["Advanced Analytics", "Machine Learning", "Statistics", "Business Intelligence", "Leadership"],
+        ["Data Science", "Business Analytics", "Statistics"],
+    ),
+    (
+        ["manager", "lead", "director"],
+        ["Senior {role}", "Director", "VP", "C-Level Executive"],
+        ["Strategic Planning", "Leadership", "Business Strategy", "Financial Management", "Team Building"],
+        ["Business", "Management", "Leadership"],
+    ),
+    (
+        ["designer", "ux", "ui"],
+        ["Senior {role}", "Design Lead", "Creative Director", "UX Director"],
+        ["Design Systems", "User Research", "Prototyping", "Leadership", "Design Strategy"],
+        ["Design", "User Experience", "Visual Design"],
+    ),
+    (
+        ["marketing", "marketer"],
+        ["Senior {role}", "Marketing Manager", "Marketing Director", "CMO"],
+        ["Digital Marketing", "Analytics", "Strategy", "Leadership", "Campaign Management"],
+        ["Marketing", "Digital Marketing", "Business"],
+    ),
+    (
+        ["scientist", "researcher"],
+        ["Senior {role}", "Research Lead", "Research Director", "Chief Scientist"],
+        ["Advanced Research", "Methodology", "Leadership", "Publication", "Grant Writing"],
+        ["Research", "Science", "Methodology"],
+    ),
+    (
+        ["consultant", "advisor"],
+        ["Senior {role}", "Principal Consultant", "Partner", "Managing Director"],
+        ["Client Management", "Business Development", "Strategy", "Leadership", "Industry Expertise"],
+        ["Business", "Consulting", "Strategy"],
+    ),
+    (
+        ["sales", "account"],
+        ["Senior {role}", "Sales Manager", "Sales Director", "VP of Sales"],
+        ["Sales Strategy", "Team Management", "Business Development", "Leadership", "Customer Success"],
+        ["Sales", "Business", "Customer Success"],
+    ),
+    (
+        ["support", "help", "customer"],
+        ["Senior {role}", "Support Manager", "Customer Success Manager", "Support Director"],
+        ["Customer Success", "Process Improvement", "Leadership", "Analytics", "Team Management"],
+        ["Customer Service", "Business", "Process Management"],
+    ),
+    (
+        ["admin", "coordinator", "assistant"],
+        ["Senior {role}", "Manager", "Director", "VP"],
+        ["Leadership", "Process Management", "Strategic Planning", "Team Management", "Business Acumen"],
+        ["Business", "Management", "Administration"],
+    ),
+]
+# Generic career progression for unknown roles
+DEFAULT_CAREER_TRACK = (
+    [],
+    ["Senior {role}", "Lead {role}", "Manager", "Director"],
+    ["Leadership", "Strategic Thinking", "Communication", "Problem Solving", "Industry Expertise"],
+    ["Business", "Leadership", "Industry-specific Skills"],
+)
+
+
+def normalize_role(job_role):
+    """Whitespace-collapsed, lowercased role; results depend only on this"""
+    return " ".join(job_role.split()).lower()
+
+
+def role_tokens(job_role):
+    """Lowercase words of a role ("UI/UX Designer" -> ["ui", "ux", "designer"])"""
+    return re.findall(r"\w+", job_role.lower())
+
+
+# Career-track keyword -> index of the first track listing it. A role
+# matches a keyword when one of its words starts with it ("engineering").
+TRACKS_BY_KEYWORD = {
+    keyword: index
+    for index, track in reversed(list(enumerate(CAREER_TRACKS)))
+    for keyword in track[0]
+}
+KEYWORD_LENGTHS = sorted({len(keyword) for keyword in TRACKS_BY_KEYWORD})
+
+
+@lru_cache(maxsize=4096)
+def match_career_track(job_role_lower):
+    """First career track with a keyword that starts a word of the role"""
+    tracks = [
+        TRACKS_BY_KEYWORD[word[:n]]
+        for word in role_tokens(job_role_lower)
+        for n in KEYWORD_LENGTHS
+        if word[:n] in TRACKS_BY_KEYWORD
+    ]
+    return CAREER_TRACKS[min(tracks)] if tracks else DEFAULT_CAREER_TRACK
+
+
+# Known roles by normalized name, so "data  scientist" finds "Data Scientist"
+ROLES_BY_NAME = {normalize_role(role): role for role in JOB_ROLE_MAPPING}
+
+# Each word of a known role name -> the roles containing it. A free-text
+# role borrows from every role with a word that occurs in it.
+ROLES_BY_WORD = {
+    word: [role for role in JOB_ROLE_MAPPING if word in role.lower().split()]
+    for word in {word for role in JOB_ROLE_MAPPING for word in role.lower().split()}
+}
+
+
+@lru_cache(maxsize=4096)
+def _relevant_subjects_and_skills(job_role_lower):
+    if job_role_lower in ROLES_BY_NAME:
+        role_data = JOB_ROLE_MAPPING[ROLES_BY_NAME[job_role_lower]]
+        return role_data["subjects"], role_data["skills"]
+
+    matched = {role for word, roles in ROLES_BY_WORD.items() if word in job_role_lower for role in roles}
+    relevant_subjects = []
+    relevant_skills = []
+    for role in JOB_ROLE_MAPPING:
+        if role in matched:
+            relevant_subjects.extend(JOB_ROLE_MAPPING[role]["subjects"])
+            relevant_skills.extend(JOB_ROLE_MAPPING[role]["skills"])
+
+    if not relevant_subjects:
+        relevant_subjects = ["Web Development", "Programming Languages", "Business", "Data Science"]
+    if not relevant_skills:
+        relevant_skills = ["Python", "JavaScript", "SQL", "Leadership"]
+
+    return list(set(relevant_subjects)), list(set(relevant_skills))
+
+
+def get_relevant_subjects_and_skills(job_role, user_skills=None):
+    """Get relevant subjects and skills for a job role (shared lists; don't mutate)"""
+    return _relevant_subjects_and_skills(normalize_role(job_role))
@@ -0,0 +1,25 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Keep the tests away from the real index, enrichment store, Gemini and
+# its response cache
+_tmp = tempfile.mkdtemp(prefix="upskill-tests-")
+os.environ["INDEX_DIR"] = os.path.join(_tmp, "index")
+os.environ["ENRICHMENT_PATH"] = os.path.join(_tmp, "enrichment.sqlite")
+os.environ["LLM_CACHE_PATH"] = os.path.join(_tmp, "llm_cache.sqlite")
+os.environ.pop("GEMINI_API_KEY", None)
+os.environ.pop("GEMINI_FAKE_LATENCY", None)
+
+
+@pytest.fixture(scope="session")
+def bundle():
+    """Index over the bundled Udemy catalog, built in memory"""
+    from artifact import build_bundle
+
+    return build_bundle()
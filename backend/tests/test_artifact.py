@@ -0,0 +1,47 @@
+import os
+
+import numpy as np
+import pytest
+
+from artifact import IndexBundle, build_bundle, extend_bundle, load_bundle, save_bundle
+from index_manifest import published_key
+from ingest import SOURCES, load_catalog_frame
+from search_index import course_corpus
+
+
+@pytest.fixture(scope="module")
+def frame():
+    return load_catalog_frame(SOURCES, {})
+
+
+def test_extend_matches_full_rebuild(frame):
+    added = 20
+    old = build_bundle(frame=frame.iloc[:-added].reset_index(drop=True), key="old")
+    extended = extend_bundle(old, frame, key="new")
+    rebuilt = build_bundle(frame=frame, key="new")
+    assert extended is not None and extended.stale_rows == added
+
+    assert extended.catalog.records(range(len(frame))) == rebuilt.catalog.records(range(len(frame)))
+    assert (extended.skill_index.matrix != rebuilt.skill_index.matrix).nnz == 0
+    # The vocabulary isn't refitted: every row matches the old vectorizer's
+    vectorizer = old.course_index.vectorizer
+    expected = vectorizer.transform(course_corpus(rebuilt.catalog))
+    assert np.allclose((extended.course_index.X - expected).toarray(), 0)
+
+
+def test_extend_rejects_edited_rows(frame):
+    old = build_bundle(frame=frame.iloc[:-20].reset_index(drop=True), key="old")
+    edited = frame.copy()
+    subject = edited.loc[0, "subject"]
+    edited.loc[0, "subject"] = next(s for s in edited["subject"].cat.categories if s != subject)
+    assert extend_bundle(old, edited, key="new") is None
+
+
+def test_save_keeps_previous_artifact(bundle, tmp_path):
+    index_dir = str(tmp_path)
+    for key in ("first", "second", "third"):
+        save_bundle(IndexBundle(bundle.catalog, bundle.course_index, bundle.skill_index, key=key), index_dir)
+    # Workers still on "second" can keep loading it until they see "third"
+    assert sorted(entry for entry in os.listdir(index_dir) if not entry.startswith(".")) == ["second", "third"]
+    assert published_key(index_dir) == "third"
+    assert load_bundle("second", index_dir) is not None
@@ -0,0 +1,33 @@
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.fixture(scope="module")
+def client():
+    import main
+
+    return TestClient(main.app)
+
+
+def test_empty_batch(client):
+    response = client.post("/recommendations/batch", json={"queries": []})
+    assert response.status_code == 200
+    assert response.json() == {"results": []}
+
+
+@pytest.mark.parametrize("limit", [3, 20])
+def test_batch_matches_first_page(client, limit):
+    query = {"job_role": "Data Scientist", "user_skills": "python", "limit": limit}
+    batch = client.post("/recommendations/batch", json={"queries": [query, {"job_role": "Web Developer"}]})
+    assert batch.status_code == 200
+    first, second = batch.json()["results"]
+    page = client.get("/recommendations", params=query).json()
+    assert first["recommendations"] == page["recommendations"]
+    assert len(first["recommendations"]) == limit
+    assert len(second["recommendations"]) == 8
+
+
+@pytest.mark.parametrize("limit", [0, 10_000])
+def test_batch_limit_validated(client, limit):
+    response = client.post("/recommendations/batch", json={"queries": [{"job_role": "Data Scientist", "limit": limit}]})
+    assert response.status_code == 422
@@ -0,0 +1,85 @@
+import itertools
+import json
+import os
+
+import numpy as np
+import pytest
+
+from career_graph import MAX_PATH_STEPS, CareerGraph
+
+
+@pytest.fixture(scope="module")
+def graph(bundle):
+    return bundle.career_graph
+
+
+def route_cost(graph, route):
+    return sum(graph.weights[a, b] for a, b in zip(route, route[1:]))
+
+
+def cheapest_routes(graph, max_steps):
+    """Brute-force cheapest cost and fewest steps between every pair of roles"""
+    n = len(graph)
+    best = {}
+    routes = [[i] for i in range(n)]
+    for steps in range(1, max_steps + 1):
+        routes = [
+            route + [j] for route in routes for j in np.flatnonzero(np.isfinite(graph.weights[route[-1]]))
+        ]
+        for route in routes:
+            key = (route[0], int(route[-1]))
+            cost = route_cost(graph, route)
+            if key not in best or cost < best[key][0]:
+                best[key] = (cost, steps)
+    return best
+
+
+def test_routes_are_cheapest(graph):
+    best = cheapest_routes(graph, MAX_PATH_STEPS)
+    hops = {steps for _, steps in best.values()}
+    assert {2, 3} <= hops
+    for source, target in itertools.permutations(range(len(graph)), 2):
+        route = graph.path(source, target)
+        if (source, target) not in best:
+            assert route is None
+            continue
+        assert route[0] == source and route[-1] == target
+        assert len(route) - 1 <= MAX_PATH_STEPS
+        assert route_cost(graph, route) == best[(source, target)][0]
+
+
+@pytest.mark.parametrize("steps", [2, 3])
+def test_multi_hop_route(graph, steps):
+    best = cheapest_routes(graph, steps)
+    shorter = cheapest_routes(graph, steps - 1)
+    # A pair only reachable with exactly ``steps`` transitions
+    source, target = next(pair for pair, (_, hops) in best.items() if hops == steps and pair not in shorter)
+    route = graph.path(source, target)
+    assert len(route) == steps + 1
+    assert route_cost(graph, route) == best[(source, target)][0]
+    assert graph.path(source, target, max_steps=steps - 1) is None
+
+
+def test_unreachable_role(graph):
+    best = cheapest_routes(graph, MAX_PATH_STEPS)
+    source, target = next(
+        pair for pair in itertools.permutations(range(len(graph)), 2) if pair not in best
+    )
+    assert graph.path(source, target) is None
+    assert graph.path(source, source) == [source]
+
+
+def test_edge_rankings_round_trip(bundle, graph, tmp_path):
+    path = str(tmp_path / "career")
+    graph.save(path)
+    restored = CareerGraph(bundle.course_index, bundle.scoring_engine)
+    assert restored.restore(path)
+    assert restored._edge_courses is not None
+    assert [rows.tolist() for rows in restored.edge_courses] == [rows.tolist() for rows in graph.edge_courses]
+
+    # Rankings saved for different edges are ignored and recomputed
+    with open(os.path.join(path, "career.json"), "w") as f:
+        json.dump({"edge_digest": "stale"}, f)
+    stale = CareerGraph(bundle.course_index, bundle.scoring_engine)
+    assert not stale.restore(path)
+    assert [rows.tolist() for rows in stale.edge_courses] == [rows.tolist() for rows in graph.edge_courses]
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+
+import pytest
+
+from catalog import Catalog
+from enrichment import enrich_catalog, stub_enrichment
+from enrichment_store import EnrichmentStore
+from ingest import SOURCES, load_catalog_frame
+from llm import FakeModel, LLMClient
+
+
+class CrashingStore(EnrichmentStore):
+    """Store that dies right after its first checkpoint, like a killed worker"""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.key_threads = []
+
+    def keys(self):
+        self.key_threads.append(threading.get_ident())
+        return super().keys()
+
+    def put_many(self, entries, model):
+        super().put_many(entries, model)
+        raise RuntimeError("worker killed")
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return Catalog(load_catalog_frame(SOURCES, {}).iloc[:40].reset_index(drop=True))
+
+
+def test_resumes_after_checkpoint(catalog, tmp_path):
+    path = str(tmp_path / "enrichment.sqlite")
+    first = FakeModel(text=stub_enrichment)
+    store = CrashingStore(path)
+
+    async def crash():
+        loop_thread = threading.get_ident()
+        with pytest.raises(RuntimeError, match="worker killed"):
+            await enrich_catalog(LLMClient(first), catalog, store, batch_size=8, retries=0)
+        return loop_thread
+
+    loop_thread = asyncio.run(crash())
+    # The catalog scan and the store read ran off the event loop
+    assert store.key_threads and loop_thread not in store.key_threads
+    checkpointed = EnrichmentStore(path).keys()
+    assert first.calls == len(checkpointed) == 8
+
+    second = FakeModel(text=stub_enrichment)
+    counts = asyncio.run(enrich_catalog(LLMClient(second), catalog, EnrichmentStore(path), batch_size=8, retries=0))
+    assert counts["stored"] == 8 and counts["failed"] == 0
+    # Only courses missing from the checkpoint were sent again
+    assert second.calls == counts["enriched"]
+    assert len(EnrichmentStore(path)) == 8 + counts["enriched"]
+
+    third = FakeModel(text=stub_enrichment)
+    counts = asyncio.run(enrich_catalog(LLMClient(third), catalog, EnrichmentStore(path), retries=0))
+    assert counts["enriched"] == third.calls == 0
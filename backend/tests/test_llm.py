@@ -0,0 +1,111 @@
+import asyncio
+
+import pytest
+
+from llm import FakeModel, LLMClient
+
+
+class CountingModel(FakeModel):
+    """FakeModel that records how many calls ran at the same time"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.active = 0
+        self.peak = 0
+
+    async def generate_content_async(self, prompt):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            return await super().generate_content_async(prompt)
+        finally:
+            self.active -= 1
+
+
+class SyncModel:
+    """Model with only the blocking API, like older SDK versions"""
+
+    def __init__(self, text):
+        self.fake = FakeModel(latency=0.01, text=text)
+
+    def generate_content(self, prompt):
+        return self.fake.generate_content(prompt)
+
+
+def test_identical_prompts_share_one_call():
+    model = FakeModel(latency=0.05, text=lambda prompt: prompt.upper())
+    client = LLMClient(model)
+
+    async def run():
+        return await asyncio.gather(*(client.generate("same prompt") for _ in range(5)), client.generate("other"))
+
+    assert asyncio.run(run()) == ["SAME PROMPT"] * 5 + ["OTHER"]
+    assert model.calls == 2
+    assert client._inflight == {}
+
+
+def test_concurrency_is_bounded():
+    model = CountingModel(latency=0.02)
+    client = LLMClient(model, max_concurrency=3)
+
+    async def run():
+        await asyncio.gather(*(client.generate(f"prompt {i}") for i in range(10)))
+
+    asyncio.run(run())
+    assert model.calls == 10
+    assert model.peak == 3
+
+
+def test_timeout():
+    client = LLMClient(FakeModel(latency=0.5), timeout=0.05)
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(client.generate("slow"))
+
+
+def test_caller_giving_up_keeps_shared_call():
+    model = FakeModel(latency=0.1, text="ok")
+    client = LLMClient(model)
+
+    async def run():
+        impatient = asyncio.wait_for(client.generate("prompt"), 0.01)
+        patient = client.generate("prompt")
+        return await asyncio.gather(impatient, patient, return_exceptions=True)
+
+    impatient, patient = asyncio.run(run())
+    assert isinstance(impatient, asyncio.TimeoutError)
+    assert patient == "ok"
+    assert model.calls == 1
+
+
+def test_errors_propagate_and_are_not_coalesced_afterwards():
+    model = FakeModel(error_rate=1.0)
+    client = LLMClient(model)
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(RuntimeError, match="429"):
+                await client.generate("prompt")
+
+    asyncio.run(run())
+    # The failed call isn't reused: the second attempt reached the model
+    assert model.calls == 2
+
+
+def test_error_rate_fails_a_fraction_of_calls():
+    model = FakeModel(error_rate=0.5, seed=1)
+    client = LLMClient(model)
+
+    async def run():
+        return await asyncio.gather(*(client.generate(f"prompt {i}") for i in range(200)), return_exceptions=True)
+
+    failures = sum(isinstance(result, RuntimeError) for result in asyncio.run(run()))
+    assert 60 < failures < 140
+
+
+def test_blocking_model_runs_in_executor():
+    client = LLMClient(SyncModel("done"))
+
+    async def run():
+        return await asyncio.gather(*(client.generate(f"prompt {i}") for i in range(4)))
+
+    assert asyncio.run(run()) == ["done"] * 4
@@ -0,0 +1,100 @@
+import asyncio
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import llm_cache
+from llm_cache import ResponseCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Controllable ``time.time`` as seen by the cache"""
+    clock = SimpleNamespace(now=1_000_000.0)
+    monkeypatch.setattr(llm_cache, "time", SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "llm_cache.sqlite")
+
+
+def test_hit_and_miss_counters(path, clock):
+    cache = ResponseCache(path)
+    assert cache.get("a") is None
+    cache.set("a", "A")
+    assert cache.get("a") == "A"
+    # Another worker on the host only shares the SQLite tier
+    other = ResponseCache(path)
+    assert other.get("a") == "A"
+    assert other.get("a") == "A"
+
+    assert cache.stats() == {
+        "hits_memory": 1, "hits_disk": 0, "misses": 1, "hit_ratio": 0.5, "memory_entries": 1, "disk_entries": 1,
+    }
+    assert other.stats()["hits_disk"] == 1 and other.stats()["hits_memory"] == 1
+
+
+def test_entries_expire_after_ttl(path, clock):
+    cache = ResponseCache(path, ttl=60)
+    cache.set("a", "A")
+    clock.now += 59
+    assert cache.get("a") == "A"
+    clock.now += 2
+    assert cache.get("a") is None
+    assert ResponseCache(path, ttl=60).get("a") is None
+    # Expired rows are deleted on eviction
+    cache.evict()
+    assert cache.stats()["disk_entries"] == 0
+
+
+def test_memory_tier_is_bounded(path, clock):
+    cache = ResponseCache(path, max_memory=2)
+    for key in "abc":
+        cache.set(key, key.upper())
+    assert list(cache.memory) == ["b", "c"]
+    # Evicted from memory, still on disk
+    assert cache.get("a") == "A"
+    assert cache.hits_disk == 1
+    assert list(cache.memory) == ["c", "a"]
+
+
+def test_disk_tier_keeps_most_recently_used(path, clock):
+    cache = ResponseCache(path, max_memory=1, max_entries=2)
+    for key in "abcd":
+        clock.now += 1
+        cache.set(key, key.upper())
+    clock.now += 1
+    assert cache.get("a") == "A"  # From disk, which marks it recently used
+    cache.evict()
+    assert cache.stats()["disk_entries"] == 2
+    fresh = ResponseCache(path)
+    assert [fresh.get(key) for key in "abcd"] == ["A", None, None, "D"]
+
+
+def test_async_access_keeps_sqlite_off_the_event_loop(path, clock):
+    cache = ResponseCache(path)
+    threads = []
+    for name in ("_get_disk", "_write"):
+        method = getattr(cache, name)
+
+        def record(*args, method=method):
+            threads.append(threading.get_ident())
+            return method(*args)
+
+        setattr(cache, name, record)
+
+    async def run():
+        loop_thread = threading.get_ident()
+        assert await cache.get_async("a") is None
+        await cache.set_async("a", "A")
+        # Memory hits are answered inline
+        assert await cache.get_async("a") == "A"
+        return loop_thread
+
+    loop_thread = asyncio.run(run())
+    assert len(threads) == 2 and loop_thread not in threads
+    assert ResponseCache(path).get("a") == "A"
+    assert cache.stats()["hits_memory"] == 1 and cache.stats()["misses"] == 1
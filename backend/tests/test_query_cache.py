@@ -0,0 +1,22 @@
+import pytest
+
+from query_cache import decode_cursor, encode_cursor, make_etag
+
+
+def test_cursor_round_trip():
+    digest = make_etag("gen-1", "data scientist", None, None)
+    assert decode_cursor(encode_cursor(24, digest), digest) == 24
+
+
+def test_cursor_rejected_after_key_change():
+    cursor = encode_cursor(24, make_etag("gen-1", "data scientist", None, None))
+    # A reload (new index key) or a different query invalidates the cursor
+    for digest in (make_etag("gen-2", "data scientist", None, None), make_etag("gen-1", "web developer", None, None)):
+        with pytest.raises(ValueError):
+            decode_cursor(cursor, digest)
+
+
+@pytest.mark.parametrize("cursor", ["", "not a cursor", encode_cursor(-8, "x"), encode_cursor("8", "x")])
+def test_malformed_cursor_rejected(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, "x")
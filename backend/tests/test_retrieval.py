@@ -0,0 +1,13 @@
+import pytest
+
+from retrieval import recall_at_k, recall_queries
+
+
+# Far fewer candidates than RETRIEVAL_CANDIDATES, so the small bundled
+# catalog is as hard to retrieve from as a large one
+@pytest.mark.parametrize("k, n", [(8, 50), (64, 100)])
+def test_two_stage_recall(bundle, k, n):
+    # /recommendations pages are ranked to depth 64
+    report = recall_at_k(bundle, recall_queries(bundle), k=k, n=n)
+    assert report["recall_mean"] >= 0.99
+    assert report["recall_min"] >= 0.95
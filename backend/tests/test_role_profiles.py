@@ -0,0 +1,34 @@
+import json
+import os
+
+from role_profiles import RoleProfileIndex
+
+
+def rankings(profiles):
+    return {name: {key: rows.tolist() for key, rows in p.top.items()} for name, p in profiles.known.items()}
+
+
+def test_rankings_round_trip(bundle, tmp_path):
+    path = str(tmp_path / "roles")
+    bundle.role_profiles.save(path)
+    expected = rankings(bundle.role_profiles)
+
+    restored = RoleProfileIndex(bundle.course_index, bundle.scoring_engine, bundle.job_roles)
+    assert restored.restore(path)
+    assert rankings(restored) == expected
+
+    # Rankings saved for other roles are ignored and ranked on first use
+    with open(os.path.join(path, "roles.json"), "w") as f:
+        json.dump({"top_digest": "stale"}, f)
+    stale = RoleProfileIndex(bundle.course_index, bundle.scoring_engine, bundle.job_roles)
+    assert not stale.restore(path)
+    assert rankings(stale) == {name: {} for name in expected}
+    stale.get("Data Scientist")
+    assert rankings(stale) == expected
+
+
+def test_known_role_top_rows(bundle):
+    profile = bundle.role_profiles.get("data scientist")
+    rows = profile.top_rows(None, None, 8)
+    assert len(rows) == 8
+    assert profile.top_rows(None, "nonexistent", 8) is None
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from scoring import top_k
+from taxonomy import match_career_track, normalize_role
+
+
+def baseline_ranking(catalog, similarities, relevant_subjects, skills, goal, k):
+    """Rows and scores of the original per-course loop of /recommendations"""
+    scored = []
+    for row, course in enumerate(catalog.records(range(len(catalog)))):
+        subject_bonus = 0.3 if course["subject"] in relevant_subjects else 0
+        popularity_bonus = min(course["popularity_score"] / 10000, 0.2)
+        skill_bonus = 0
+        if skills:
+            text = f"{course['title']} {course['description']}".lower()
+            skill_bonus = sum(1 for skill in skills if skill.lower() in text) / len(skills) * 0.4
+        goal_bonus = 0.3 if goal and goal.lower() in course["title"].lower() else 0
+        score = similarities[row] + subject_bonus + popularity_bonus + skill_bonus + goal_bonus
+        scored.append((row, score))
+    scored.sort(key=lambda item: item[1], reverse=True)
+    return [(row, score) for row, score in scored if score > 0][:k]
+
+
+@pytest.mark.parametrize("job_role, skills, goal", [
+    ("Data Scientist", ["python", "statistics"], None),
+    ("Web Developer", [], "javascript"),
+    ("Accountant", ["excel", "taxes", "excel"], "finance"),
+    ("Basket Weaver", [], None),
+])
+def test_score_matches_baseline_loop(bundle, job_role, skills, goal):
+    catalog, engine = bundle.catalog, bundle.scoring_engine
+    relevant_subjects = match_career_track(normalize_role(job_role))[3]
+    rows = np.arange(len(catalog))
+    similarities = bundle.course_index.similarities(job_role, rows)
+
+    scores, _ = engine.score(rows, similarities, relevant_subjects, skills, goal)
+    expected = baseline_ranking(catalog, similarities, relevant_subjects, skills, goal, 64)
+    positive = np.flatnonzero(scores > 0)
+    ranked = positive[top_k(scores[positive], 64)]
+
+    assert ranked.tolist() == [row for row, _ in expected]
+    assert np.allclose(scores[ranked], [score for _, score in expected])
+
+
+def test_score_ties_keep_catalog_order(bundle):
+    engine = bundle.scoring_engine
+    rows = np.arange(len(bundle.catalog))
+    # No similarity, subject, skill or goal signal: only popularity, which
+    # is capped, so many courses tie at the cap
+    scores, _ = engine.score(rows, np.zeros(len(rows)), [])
+    tied = np.flatnonzero(scores == scores.max())
+    assert len(tied) > 1
+    assert top_k(scores, len(tied)).tolist() == tied.tolist()
+
+
+@pytest.mark.parametrize("k", [0, 1, 3, 5, 10, 20])
+def test_top_k_is_stable_descending_sort(k):
+    rng = np.random.default_rng(k)
+    scores = rng.integers(0, 4, size=16).astype(float)
+    expected = sorted(range(len(scores)), key=lambda i: -scores[i])[:k]
+    assert top_k(scores, k).tolist() == expected
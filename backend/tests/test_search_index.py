@@ -0,0 +1,14 @@
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize("paid, platform", [(None, None), (True, None), (False, "udemy")])
+def test_vector_similarities_match_cosine(bundle, paid, platform):
+    course_index = bundle.course_index
+    query = course_index.query_vector("data scientist python")
+    full = (course_index.X @ query.T).toarray().ravel()
+    rows = course_index.rows(paid, platform)
+    # Large row sets take the matrix-vector path, small ones are sliced
+    for subset in (rows, rows[:10]):
+        assert np.allclose(course_index.vector_similarities(query, subset), full[subset])
+    assert len(course_index.vector_similarities(query, rows[:0])) == 0
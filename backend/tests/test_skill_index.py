@@ -0,0 +1,45 @@
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from skill_index import SkillIndex
+
+
+class YieldingDict(OrderedDict):
+    """LRU storage that gives up the GIL between a lookup and its update"""
+
+    def get(self, key, default=None):
+        value = super().get(key, default)
+        time.sleep(0)
+        return value
+
+
+class PrecomputedSkillIndex(SkillIndex):
+    """Serves precomputed columns, so threads spend their time in the LRU"""
+
+    def __init__(self, catalog, columns, cache_size):
+        super().__init__(catalog, [], cache_size=cache_size)
+        self.columns = columns
+        self._cache = YieldingDict()
+
+    def _match_column(self, skill_lower):
+        time.sleep(0)
+        return self.columns[skill_lower]
+
+
+def test_concurrent_column_matches_serial(bundle):
+    # Skills outside the matrix go through the LRU; a one-entry cache keeps
+    # it evicting while other threads read it
+    skills = ["pandas", "numpy", "docker"]
+    expected = {skill: SkillIndex(bundle.catalog, []).column(skill) for skill in skills}
+    index = PrecomputedSkillIndex(bundle.catalog, expected, cache_size=1)
+
+    def check(i):
+        skill = skills[i % len(skills)]
+        return np.array_equal(index.column(skill), expected[skill])
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        assert all(pool.map(check, range(20000)))
+    assert len(index._cache) <= 1